@@ -1,30 +1,29 @@
 """CLI for RDS MCP server."""
-import anyio
 import argparse
 import logging
-from coralogix_mcp.server import CoralogixMCPServer
+from coralogix_mcp.server import CoralogixMCPServer, TRANSPORTS
+from coralogix_mcp.common.store import DEFAULT_CACHE_PATH
+from coralogix_mcp.common.transport import DEFAULT_REQUESTS_PER_SECOND
+from coralogix_mcp.workers import run_workers
 
 logger = logging.getLogger('coralogix_mcp')
 
-async def perform_async_initialization(server_obj: CoralogixMCPServer) -> None:
-    """Initialize AWS clients asynchronously."""
-    try:
-        # AWS clients are now initialized by AWSClientManager in the constructor
-        # No need for explicit initialization
-        pass
-    except Exception as e:
-        logger.error(f"Failed to initialize AWS clients: {e}")
-        return 1
-
 def main():
     """Main entry point for the CLI."""
     parser = argparse.ArgumentParser(description="Coralogix MCP Server")
+    parser.add_argument("--transport", default="stdio", choices=TRANSPORTS, help="MCP transport; sse and streamable-http listen on --host/--port and serve many sessions")
     parser.add_argument("--host", default="localhost", type=str, help="Custom host for the server")
     parser.add_argument("--port", default=8000, type=int, help="Custom port for the server")
+    parser.add_argument("--workers", default=1, type=int, help="Worker processes for the streamable-http transport; they share the disk cache")
     parser.add_argument("--model", default="openai/gpt-4o-mini", type=str, help="OpenAI model to use")
     parser.add_argument("--openai-api-key", type=str, required=True, help="OpenAI API key")
     parser.add_argument("--coralogix-api-key", type=str, required=True, help="Coralogix API key")
     parser.add_argument("--application-name", type=str, required=True, help="Application name")
+    parser.add_argument("--applications", type=str, help="Comma-separated applications tools may query besides --application-name; any application when omitted")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, type=str, help="SQLite file for the persistent service name cache")
+    parser.add_argument("--no-disk-cache", action="store_true", help="Disable the persistent service name cache")
+    parser.add_argument("--requests-per-second", default=DEFAULT_REQUESTS_PER_SECOND, type=float, help="Rate limit for Coralogix API requests, 0 to disable")
+    parser.add_argument("--tenant-requests-per-second", type=float, help="Rate limit for the requests of each application, within --requests-per-second")
 
     args = parser.parse_args()
 
@@ -32,18 +31,33 @@ def main():
         logger.error("OpenAI API key, Coralogix API key, and application name are required")
         return 1
 
-    try:
-        # Create server instance
-        server = CoralogixMCPServer(
+    if args.workers > 1 and args.transport != "streamable-http":
+        logger.error("--workers needs --transport streamable-http")
+        return 1
+    if args.workers > 1 and args.no_disk_cache:
+        logger.warning("Workers will not share query results or the service catalog with --no-disk-cache")
+
+    def build_server():
+        # The rate limit is per process, so workers split the configured budget
+        return CoralogixMCPServer(
             model=args.model,
             openai_api_key=args.openai_api_key,
             coralogix_api_key=args.coralogix_api_key,
-            application_name=args.application_name
+            application_name=args.application_name,
+            cache_path=None if args.no_disk_cache else args.cache_path,
+            requests_per_second=args.requests_per_second / max(1, args.workers),
+            shared_results=args.workers > 1,
+            applications=[name.strip() for name in args.applications.split(",") if name.strip()] if args.applications else None,
+            tenant_requests_per_second=args.tenant_requests_per_second / max(1, args.workers) if args.tenant_requests_per_second else None
         )
 
-        anyio.run(perform_async_initialization, server)
+    try:
         logger.info("Starting Coralogix MCP Server")
-        server.run_mcp_blocking()
+        if args.workers > 1:
+            return run_workers(build_server, args.transport, args.host, args.port, args.workers)
+
+        server = build_server()
+        server.run_mcp_blocking(transport=args.transport, host=args.host, port=args.port)
         return 0
 
     except Exception as e:
@@ -1,126 +1,588 @@
-import requests
-from typing import Dict, Optional
+import asyncio
+import functools
+import hashlib
+import httpx
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta, timezone
 import json
+import re
+from coralogix_mcp.common import jsonlib
+from coralogix_mcp.common.aggregate import EndpointAggregator
+from coralogix_mcp.common.buckets import MinuteBuckets
+from coralogix_mcp.common.cache import TenantCacheView, TTLCache
+from coralogix_mcp.common.cursors import SearchCursor, decode_cursor_token, encode_cursor_token
 from coralogix_mcp.common.logger import setup_logger
-from litellm import completion
+from coralogix_mcp.common.ndjson import iter_dataprime_results
+from coralogix_mcp.common.records import LazyRecord, dump_records, extract_log_text, load_records
+from coralogix_mcp.common.service_index import ServiceNameIndex
+from coralogix_mcp.common.singleflight import SingleFlight
+from coralogix_mcp.common.store import PersistentStore
+from coralogix_mcp.common.transport import RetryableStatusError, RETRYABLE_STATUS_CODES, TransportPolicy, parse_retry_after
 
 # CORALOGIX_API_URL = "https://ng-api-http.coralogixsg.com/api/v1/dataprime/query" #deprecated
 CORALOGIX_API_URL = "https://api.ap2.coralogix.com/api/v1/dataprime/query"
 
+# Shared connection pool settings for the DataPrime HTTP client
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+
+# Status code ranges per HTTP status class. "2xx" historically includes redirects.
+STATUS_CLASS_RANGES = {
+    "2xx": (200, 399),
+    "4xx": (400, 499),
+    "5xx": (500, 599)
+}
+HTTP_OVERVIEW_RANGE = (200, 599)
+
+# Raw log searches only fetch the fields the tools read, instead of full records with
+# all metadata, labels and userData
+PROJECTED_LOG_FIELDS = (
+    " | choose $d.logRecord.body.log as $d.log, $m.timestamp as $d.timestamp, "
+    "$l.subsystemname as $d.subsystemname, $m.severity as $d.severity"
+)
+
+# DataPrime tiers. Short, recent windows are answered much faster by frequent search.
+TIER_ALIASES = {
+    "frequent": "TIER_FREQUENT_SEARCH",
+    "archive": "TIER_ARCHIVE"
+}
+FREQUENT_SEARCH_RETENTION_HOURS = 24
+FREQUENT_SEARCH_MAX_WINDOW_MINUTES = 360
+
+# Deadline for LLM service-name resolution before falling back to basic matching
+LLM_TIMEOUT_SECONDS = 5.0
+# A call left running in the background past the deadline is abandoned after this many deadlines
+LLM_HARD_TIMEOUT_FACTOR = 6
+
+# Fuzzy matching: shortlist size sent to the LLM, and the scores that skip the LLM entirely
+LLM_SHORTLIST_SIZE = 10
+CONFIDENT_MATCH_SCORE = 0.8
+CONFIDENT_MATCH_FLOOR = 0.6
+CONFIDENT_MATCH_MARGIN = 0.2
+
+# Fraction of the service catalog TTL after which the background refresher reloads it
+CATALOG_REFRESH_AHEAD = 0.8
+
+# Service name resolution cache: TTL for matches, and the shorter TTL for cached misses
+MATCH_CACHE_TTL = 3600
+NEGATIVE_MATCH_TTL = 60
+NO_MATCH = object()
+
+# Result cache TTLs in seconds, by the query_type passed to search_coralogix_logs
+QUERY_CACHE_TTLS = {
+    "http": 60,
+    "critical": 30,
+    "search": 60,
+    "default": 30,
+    # Windows that closed more than SEALED_WINDOW_LAG_MINUTES ago
+    "sealed": 900
+}
+SEALED_WINDOW_LAG_MINUTES = 5
+
+# Long windows are split into aligned shards of SHARD_MINUTES, queried concurrently
+SHARD_THRESHOLD_MINUTES = 120
+SHARD_MINUTES = 60
+MAX_CONCURRENT_SHARDS = 4
+
+# Results with more records than this are not shared between workers, encoding them costs more than a re-query
+MAX_SHARED_RESULT_RECORDS = 5000
+
+# Rolling HTTP stats are kept as per-minute buckets so polls only fetch new minutes
+HTTP_BUCKET_CAPACITY_MINUTES = 60
+BUCKET_SEAL_LAG_MINUTES = 2
+
+# Paged searches keep their results in an expiring server-side cursor
+SEARCH_PAGE_SIZE = 100
+MAX_SEARCH_PAGE_SIZE = 1000
+CURSOR_FETCH_SIZE = 1000
+CURSOR_TTL = 600
+MAX_OPEN_CURSORS = 128
+MAX_CURSOR_RESULTS = 10000
+
+# Batch queries over more services than this fan out per service instead of one grouped query
+MAX_GROUPED_SERVICES = 50
+MAX_CONCURRENT_SERVICE_QUERIES = 4
+# Names of one batch resolved at a time; each ambiguous name may need an LLM call
+MAX_CONCURRENT_NAME_RESOLUTIONS = 4
+
+TOP_APIS_LIMIT = 15
+
 logger = setup_logger('coralogix_mcp')
 
+
+async def acompletion(**kwargs):
+    """Call litellm.acompletion, importing litellm on first use.
+    litellm's import graph adds seconds to process start, and most sessions never need it."""
+    from litellm import acompletion as litellm_acompletion
+    return await litellm_acompletion(**kwargs)
+
+
+def status_class(status_code) -> Optional[str]:
+    """Map an HTTP status code to its key in STATUS_CLASS_RANGES, or None"""
+    try:
+        code = int(float(status_code))
+    except (TypeError, ValueError):
+        return None
+    for name, (low, high) in STATUS_CLASS_RANGES.items():
+        if low <= code <= high:
+            return name
+    return None
+
+
+def time_shards(start_time: datetime, end_time: datetime, shard_minutes: int) -> List[Tuple[datetime, datetime]]:
+    """Split a window into shards aligned to a fixed shard_minutes grid, clipped to the window"""
+    shard = timedelta(minutes=shard_minutes)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    cursor = epoch + ((start_time - epoch) // shard) * shard
+    shards = []
+    while cursor < end_time:
+        shards.append((max(cursor, start_time), min(cursor + shard, end_time)))
+        cursor += shard
+    return shards
+
+
+def query_limit(query: str) -> Optional[int]:
+    """Return N for a query ending in '| limit N', otherwise None"""
+    match = re.search(r"\|\s*limit\s+(\d+)\s*$", query)
+    return int(match.group(1)) if match else None
+
+
+def merge_groupby_counts(shard_results: List[list]) -> List[Dict]:
+    """Merge HTTP groupby rows from several shards, summing log_count per group
+    (path, method and status, plus the subsystem for per-service queries)"""
+    first_row = next((row for results in shard_results for row in results), None)
+    if first_row is None:
+        return []
+    fields = [field for field in first_row if field != "log_count"]
+    # Sized for every input row, so the merged counts are exact
+    aggregator = EndpointAggregator(max_endpoints=sum(len(results) for results in shard_results), fields=fields)
+    for results in shard_results:
+        aggregator.add_rows(results, skip_unknown_paths=False)
+    return aggregator.rows()
+
+
+def merge_by_timestamp(shard_results: List[list], limit: Optional[int] = None) -> list:
+    """Merge raw log records from several shards, newest first, keeping at most limit records"""
+    merged = [record for results in shard_results for record in results]
+    merged.sort(key=lambda record: str(record.get("timestamp") or ""), reverse=True)
+    return merged[:limit] if limit is not None else merged
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO-8601 timestamp, treating naive values as UTC"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def record_time(record) -> Optional[datetime]:
+    """Return the parsed timestamp of a log record, or None if it has none"""
+    try:
+        return parse_timestamp(str(record.get("timestamp")))
+    except ValueError:
+        return None
+
+
+def format_timestamp(value: datetime) -> str:
+    """Format a UTC datetime the way the DataPrime API expects"""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def floor_to_minute(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+def ceil_to_minute(value: datetime) -> datetime:
+    floored = floor_to_minute(value)
+    return floored if floored == value else floored + timedelta(minutes=1)
+
 class CoralogixClient:
-    def __init__(self, model: str, openai_api_key: str, coralogix_api_key: str, application_name: str, time_range_minutes: int = 15):
-        """Initialize the CoralogixClient"""
+    def __init__(
+        self,
+        model: str,
+        openai_api_key: str,
+        coralogix_api_key: str,
+        application_name: str,
+        time_range_minutes: int = 15,
+        query_cache_size: int = 256,
+        llm_timeout: float = LLM_TIMEOUT_SECONDS,
+        cache_path: Optional[str] = None,
+        match_cache_size: int = 1024,
+        frequent_search_retention_hours: float = FREQUENT_SEARCH_RETENTION_HOURS,
+        max_concurrent_shards: int = MAX_CONCURRENT_SHARDS,
+        incremental_http_stats: bool = True,
+        transport: Optional[TransportPolicy] = None,
+        shared_results: bool = False,
+        http_client: Optional[httpx.AsyncClient] = None,
+        query_cache: Optional[Union[TTLCache, TenantCacheView]] = None
+    ):
+        """Initialize the CoralogixClient. When cache_path is given, the service catalog and
+        name resolutions are persisted there and reloaded by the next process. transport sets the
+        rate limit, retry and circuit breaker policy of API requests, see TransportPolicy.
+        shared_results also shares query results and catalog refreshes through cache_path with
+        the other processes using it, for the multi-worker mode. http_client and query_cache let
+        several clients share one connection pool and result cache, see ClientRegistry."""
         self.model = model
         self.openai_api_key = openai_api_key
         self.coralogix_api_key = coralogix_api_key
         self.application_name = application_name
         self.time_range_minutes = time_range_minutes
+        self.llm_timeout = llm_timeout
+        self.frequent_search_retention_hours = frequent_search_retention_hours
+        self.max_concurrent_shards = max_concurrent_shards
+        self.incremental_http_stats = incremental_http_stats
+        self.transport = transport or TransportPolicy.default()
+        self.shared_results = shared_results
+        self._background_tasks = set()
+        self._refresh_task = None
+        self._refresh_users = 0
     
         self._service_name_cache = {
             "data": None,
             "timestamp": None,
             "cache_ttl": 300
         }
-        self._service_name_matching_cache = {}
-        self.end_time = datetime.now(timezone.utc)
-        self.start_time = self.end_time - timedelta(minutes=time_range_minutes)
+        self._service_name_matching_cache = TTLCache(maxsize=match_cache_size, default_ttl=MATCH_CACHE_TTL)
+        self.query_cache = query_cache if query_cache is not None else TTLCache(maxsize=query_cache_size, default_ttl=QUERY_CACHE_TTLS["default"])
+        self._inflight = SingleFlight()
+        self._tier_stats = {}
+        self._http_buckets = TTLCache(maxsize=128, default_ttl=HTTP_BUCKET_CAPACITY_MINUTES * 60)
+        self._cursors = TTLCache(maxsize=MAX_OPEN_CURSORS, default_ttl=CURSOR_TTL)
+        # Signs cursor tokens; every worker serving this application derives the same key
+        self._cursor_key = hashlib.sha256(f"cursor:{coralogix_api_key}:{application_name}".encode()).digest()
         
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {coralogix_api_key}"
         }
-        self.metadata = {
+
+        self.service_names_available = []
+        self._service_index = None
+        self._http = http_client
+        self._owns_http = http_client is None
+
+        self._store = None
+        if cache_path:
+            self._load_persistent_cache(cache_path)
+
+    def _load_persistent_cache(self, cache_path: str):
+        """Open the on-disk store and seed the in-memory caches from it"""
+        try:
+            self._store = PersistentStore(cache_path)
+            catalog = self._store.load_catalog(self.application_name)
+            resolutions = self._store.load_resolutions(self.application_name)
+        except sqlite3.Error as e:
+            logger.warning(f"Persistent cache unavailable at {cache_path}: {str(e)}")
+            self._store = None
+            return
+
+        if catalog:
+            service_names, updated_at = catalog
+            self._service_name_cache["data"] = service_names
+            self._service_name_cache["timestamp"] = datetime.fromtimestamp(updated_at, tz=timezone.utc)
+            self._service_name_cache["source"] = "disk"
+            self._service_index = ServiceNameIndex(service_names)
+            self.service_names_available = service_names
+        for requested_name, resolved_name in resolutions.items():
+            self._service_name_matching_cache.set(requested_name, resolved_name)
+        logger.info(f"Loaded {len(catalog[0]) if catalog else 0} service names and {len(resolutions)} resolutions from {cache_path}")
+
+    def _persist(self, method: str, *args):
+        """Write through to the on-disk store, never failing the caller"""
+        if self._store is None:
+            return
+        try:
+            getattr(self._store, method)(self.application_name, *args)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to update persistent cache: {str(e)}")
+
+    async def _run_in_store_thread(self, fn, *args):
+        """Run a blocking store call, including its JSON encoding, off the event loop.
+        SQLite may wait up to its busy timeout on another worker's write lock."""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+    async def _persist_async(self, method: str, *args):
+        """Like _persist, for writes large or contended enough to keep off the event loop"""
+        if self._store is None:
+            return
+        try:
+            await self._run_in_store_thread(getattr(self._store, method), self.application_name, *args)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to update persistent cache: {str(e)}")
+
+    async def _load_shared_results(self, cache_key: tuple):
+        """Return (results, seconds left) of a query result cached by another process, or None"""
+        if not self.shared_results or self._store is None:
+            return None
+        try:
+            shared = await self._run_in_store_thread(self._store.load_results, self.application_name, json.dumps(cache_key))
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read shared query results: {str(e)}")
+            return None
+        if shared is None:
+            return None
+        items, expires_at = shared
+        return load_records(items), expires_at - time.time()
+
+    async def _save_shared_results(self, cache_key: tuple, results: list, ttl: float):
+        if not self.shared_results or len(results) > MAX_SHARED_RESULT_RECORDS:
+            return
+        await self._persist_async("save_results", json.dumps(cache_key), dump_records(results), ttl)
+
+    async def _adopt_shared_catalog(self) -> Optional[list]:
+        """Use a catalog another process refreshed recently instead of querying Coralogix again"""
+        if not self.shared_results or self._store is None:
+            return None
+        try:
+            catalog = await self._run_in_store_thread(self._store.load_catalog, self.application_name)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read shared service catalog: {str(e)}")
+            return None
+        if catalog is None:
+            return None
+
+        service_names, updated_at = catalog
+        stored_at = datetime.fromtimestamp(updated_at, tz=timezone.utc)
+        age = (datetime.now(timezone.utc) - stored_at).total_seconds()
+        current = self._service_name_cache["timestamp"]
+        if age >= self._service_name_cache["cache_ttl"] * CATALOG_REFRESH_AHEAD or (current is not None and stored_at <= current):
+            return None
+
+        logger.info(f"Using service catalog refreshed by another worker {age:.0f}s ago")
+        previous_names = self._service_name_cache["data"]
+        self._service_name_cache["data"] = service_names
+        self._service_name_cache["timestamp"] = stored_at
+        self._service_name_cache["source"] = "disk"
+        if previous_names is not None:
+            self._invalidate_matches(previous_names, service_names)
+        self._service_index = ServiceNameIndex(service_names)
+        return service_names
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Shared pooled keep-alive HTTP client, created on first use"""
+        if self._http is None or self._http.is_closed:
+            self._owns_http = True
+            self._http = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=HTTP_TIMEOUT,
+                limits=HTTP_LIMITS
+            )
+        return self._http
+
+    async def aclose(self):
+        """Close the shared HTTP client and release pooled connections, unless it belongs to a ClientRegistry,
+        and the on-disk store connection"""
+        if self._owns_http and self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def query_window(self, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None):
+        """Compute the query time window at call time, aligned to minute boundaries
+        Args:
+            time_range_minutes: Length of the window ending now (or at `end`). Defaults to the client's time_range_minutes.
+            start: Optional ISO-8601 start time. Overrides time_range_minutes when given.
+            end: Optional ISO-8601 end time. Defaults to the current time.
+        Returns:
+            A (start_time, end_time) tuple of UTC datetimes. Both ends are aligned to whole minutes so that
+            identical requests made within the same minute produce identical payloads.
+        """
+        if end:
+            end_time = parse_timestamp(end)
+        else:
+            end_time = datetime.now(timezone.utc)
+        end_time = ceil_to_minute(end_time)
+
+        if start:
+            start_time = floor_to_minute(parse_timestamp(start))
+        else:
+            minutes = time_range_minutes or self.time_range_minutes
+            start_time = end_time - timedelta(minutes=minutes)
+
+        if start_time >= end_time:
+            raise ValueError(f"Invalid time window: start {start_time.isoformat()} is not before end {end_time.isoformat()}")
+        return start_time, end_time
+
+    def select_tier(self, start_time: datetime, end_time: datetime, tier: Optional[str] = None) -> str:
+        """Choose the DataPrime tier for a window
+        Args:
+            start_time: Window start
+            end_time: Window end
+            tier: Optional override: "auto" (default), "frequent", "archive", or a full TIER_* name
+        Returns:
+            TIER_FREQUENT_SEARCH for short windows within frequent-search retention, TIER_ARCHIVE otherwise
+        """
+        if tier and tier != "auto":
+            resolved_tier = TIER_ALIASES.get(tier.lower(), tier.upper())
+            if resolved_tier not in TIER_ALIASES.values():
+                raise ValueError(f"Unknown tier {tier}, expected one of auto, {', '.join(TIER_ALIASES)}")
+            return resolved_tier
+
+        age = datetime.now(timezone.utc) - start_time
+        size = end_time - start_time
+        if age <= timedelta(hours=self.frequent_search_retention_hours) and size <= timedelta(minutes=FREQUENT_SEARCH_MAX_WINDOW_MINUTES):
+            return TIER_ALIASES["frequent"]
+        return TIER_ALIASES["archive"]
+
+    def build_metadata(self, start_time: datetime, end_time: datetime, tier: Optional[str] = None) -> Dict:
+        """Build DataPrime query metadata for the given window, see select_tier for the tier"""
+        return {
             "syntax": "QUERY_SYNTAX_DATAPRIME",
-            "tier": "TIER_ARCHIVE",
-            "startTime": self.start_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
-            "endTime": self.end_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "tier": self.select_tier(start_time, end_time, tier),
+            "startTime": format_timestamp(start_time),
+            "endTime": format_timestamp(end_time),
             "defaultSource": "logs"
         }
 
-        self.service_names_available = []
-
     async def initialize_coralogix_client(self):
         """Initialize Coralogix client Data"""
         self.service_names_available =  await self.fetch_service_names()
         logger.info(f"Initialized Coralogix client with {len(self.service_names_available)} service names")
 
+    async def start_background_refresh(self):
+        """Warm the service catalog and keep refreshing it ahead of expiry.
+        Calls are reference counted so several sessions can share one refresher."""
+        self._refresh_users += 1
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._catalog_refresh_loop())
+
+    async def stop_background_refresh(self):
+        """Release one start_background_refresh call, cancelling the refresher after the last one"""
+        self._refresh_users = max(0, self._refresh_users - 1)
+        if self._refresh_users == 0 and self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _catalog_refresh_loop(self):
+        interval = self._service_name_cache["cache_ttl"] * CATALOG_REFRESH_AHEAD
+        while True:
+            if self._service_name_cache_age() is None or self._service_name_cache_age() >= interval:
+                try:
+                    service_names = await self.refresh_service_names()
+                    if service_names:
+                        self.service_names_available = service_names
+                    logger.info(f"Refreshed service catalog with {len(service_names)} service names")
+                except Exception as e:
+                    logger.error(f"Error refreshing service names: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def _service_name_cache_age(self) -> Optional[float]:
+        """Seconds since the service catalog was last loaded, or None if it never was"""
+        if self._service_name_cache["data"] is None or self._service_name_cache["timestamp"] is None:
+            return None
+        return (datetime.now(timezone.utc) - self._service_name_cache["timestamp"]).total_seconds()
+
+    def _service_names_query(self) -> str:
+        return f"source logs | filter $l.applicationname == '{self.application_name}' | filter $l.subsystemname != null | groupby $l.subsystemname"
+
+    async def refresh_service_names(self):
+        """Reload the service catalog from Coralogix, joining a refresh already in flight"""
+        query = self._service_names_query()
+        return await self._inflight.do(("service_names", query), functools.partial(self._load_service_names, query))
+
     async def fetch_service_names(self):
-        """Fetch service names from Coralogix"""
-        current_time = datetime.now(timezone.utc)
-        query = f"source logs | filter $l.applicationname == '{self.application_name}' | filter $l.subsystemname != null | groupby $l.subsystemname"
+        """Fetch service names from Coralogix.
+        Once a catalog has been loaded, an expired copy is returned immediately while a
+        refresh runs in the background (stale-while-revalidate)."""
+        age = self._service_name_cache_age()
 
         # Check if we have valid cache data
-        if (self._service_name_cache["data"] is not None and 
-            self._service_name_cache["timestamp"] is not None and 
-            (current_time - self._service_name_cache["timestamp"]).total_seconds() < self._service_name_cache["cache_ttl"]):
+        if age is not None and age < self._service_name_cache["cache_ttl"]:
             logger.info("Returning cached service names")
             return self._service_name_cache["data"]
 
+        if age is not None:
+            logger.info("Returning stale service names and refreshing in background")
+            task = asyncio.ensure_future(self.refresh_service_names())
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            return self._service_name_cache["data"]
+
+        return await self.refresh_service_names()
+
+    async def _load_service_names(self, query: str):
+        """Run the subsystem groupby query and refresh the service name cache"""
+        current_time = datetime.now(timezone.utc)
+        shared_names = await self._adopt_shared_catalog()
+        if shared_names:
+            return shared_names
         try:
+            start_time, end_time = self.query_window()
             payload = {
                 "query": query,
-                "metadata": self.metadata
+                # Subsystems that only log to the archive tier must stay in the catalog
+                "metadata": self.build_metadata(start_time, end_time, "archive")
             }
-            response = requests.post(
-                f"{CORALOGIX_API_URL}",
-                json=payload,
-                headers=self.headers
-            )
-
-            if response.ok:
-                try:
-                    json_lines = [line.strip() for line in response.text.split('\n') if line.strip()]
-                    if len(json_lines) >= 2:
-                        results_json = json.loads(json_lines[1])
-                        log_results = results_json.get("result", {}).get("results", [])
-                        
-                        if not log_results:
-                            logger.info("No logs found for the given time period")
-                            return []
-                            
-                        service_names = []
-                        for log in log_results:
-                            try:
-                                user_data = json.loads(log.get("userData", "{}"))
-                                subsystem_name = user_data.get("subsystemname")
-                                if subsystem_name:
-                                    service_names.append(subsystem_name)
-                            except json.JSONDecodeError:
-                                logger.warning(f"Failed to parse userData JSON: {log.get('userData')}")
-                                continue
-                        
-                        logger.info(f"Found {len(service_names)} service names")
-                        
-                        self._service_name_cache["data"] = service_names
-                        self._service_name_cache["timestamp"] = current_time
-                        
-                        return service_names
-                    else:
-                        logger.info("No service names found")
-                        return []
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error parsing response: {e}")
-                    return []
-            else:
-                logger.error(f"Failed to fetch service names: {response.status_code} - {response.text}")
+            service_names = await self.transport.run(lambda: self._stream_service_names(payload))
+            if not service_names:
+                logger.info("No service names found")
                 return []
-            
+
+            logger.info(f"Found {len(service_names)} service names")
+
+            previous_names = self._service_name_cache["data"]
+            self._service_name_cache["data"] = service_names
+            self._service_name_cache["timestamp"] = current_time
+            self._service_name_cache["source"] = "api"
+            if previous_names is not None:
+                self._invalidate_matches(previous_names, service_names)
+            self._service_index = ServiceNameIndex(service_names)
+            await self._persist_async("save_catalog", service_names)
+
+            return service_names
+
         except Exception as e:
             logger.error(f"Error fetching service names: {str(e)}")
             return []
 
+    async def _stream_service_names(self, payload: Dict) -> list:
+        """POST the subsystem groupby payload and decode the service names"""
+        async with self.http.stream("POST", CORALOGIX_API_URL, json=payload) as response:
+            if not response.is_success:
+                await response.aread()
+                logger.error(f"Failed to fetch service names: {response.status_code} - {response.text}")
+                self._raise_for_retryable(response)
+                return []
+
+            service_names = []
+            try:
+                async for log in iter_dataprime_results(response.aiter_bytes()):
+                    try:
+                        user_data = jsonlib.loads(log.get("userData", "{}"))
+                        subsystem_name = user_data.get("subsystemname")
+                        if subsystem_name:
+                            service_names.append(subsystem_name)
+                    except jsonlib.JSONDecodeError:
+                        logger.warning(f"Failed to parse userData JSON: {log.get('userData')}")
+                        continue
+            except jsonlib.JSONDecodeError as e:
+                logger.error(f"Error parsing response: {e}")
+                return []
+        return service_names
+
     async def find_matching_coralogix_service_name(self, service_name: str) -> str:
         """Find Coralogix service name"""
         if not service_name:
             logger.error("No service name provided")
             return None
 
-        if service_name in self._service_name_matching_cache:
+        cached_match = self._service_name_matching_cache.get(service_name)
+        if cached_match is NO_MATCH:
+            logger.info(f"Returning cached miss for service name: {service_name}")
+            return None
+        if cached_match is not None:
             logger.info(f"Returning cached match for service name: {service_name}")
-            return self._service_name_matching_cache[service_name]
+            return cached_match
         
         service_names_available = await self.fetch_service_names()
         if not service_names_available:
@@ -129,9 +591,89 @@ class CoralogixClient:
         
         if service_name in service_names_available:
             logger.info(f"Found exact match for service name: {service_name}")
-            self._service_name_matching_cache[service_name] = service_name
+            self._remember_match(service_name, service_name)
             return service_name
         
+        index = self._service_index_for(service_names_available)
+        shortlist = index.top_k(service_name, k=LLM_SHORTLIST_SIZE)
+        if self._is_confident_match(shortlist):
+            best_match = shortlist[0][0]
+            logger.info(f"Index found confident match for service name: {service_name} -> {best_match}")
+            self._remember_match(service_name, best_match)
+            return best_match
+
+        # Ambiguous names only show the LLM the closest candidates, unless nothing is close at all
+        candidates = [name for name, _ in shortlist] or service_names_available
+
+        # The LLM gets a strict deadline; a late answer still lands in the cache for next time
+        llm_task = asyncio.ensure_future(self._find_llm_match(service_name, candidates))
+        done, _ = await asyncio.wait({llm_task}, timeout=self.llm_timeout)
+        if llm_task in done:
+            best_match = llm_task.result()
+            if best_match:
+                return best_match
+        else:
+            logger.warning(f"LLM matching for {service_name} exceeded {self.llm_timeout}s, continuing in background")
+            self._background_tasks.add(llm_task)
+            llm_task.add_done_callback(self._background_tasks.discard)
+        
+        # Fallback to basic matching if LLM fails, times out or returns invalid result
+        logger.info("Falling back to basic matching")
+        best_match = self.find_best_match_basic(service_name, service_names_available)
+        if best_match:
+            logger.info(f"Basic matching found match for service name: {service_name} -> {best_match}")
+            self._remember_match(service_name, best_match)
+        else:
+            logger.warning(f"No match found for service name: {service_name}")
+            # Misses are cached briefly so repeated lookups of unknown services cost nothing
+            self._service_name_matching_cache.set(service_name, NO_MATCH, ttl=NEGATIVE_MATCH_TTL)
+        
+        return best_match
+
+    def _invalidate_matches(self, previous_names: list, service_names: list):
+        """Drop the cached resolutions a catalog change made stale: those leading to a service that
+        left the catalog and, when services were added, the cached misses they may now answer.
+        The catalog only covers the recent query window, so quiet services come and go often;
+        every other resolution is kept."""
+        removed = set(previous_names) - set(service_names)
+        added = set(service_names) - set(previous_names)
+        if not removed and not added:
+            return
+        dropped = self._service_name_matching_cache.invalidate_where(
+            lambda requested_name, resolved_name: resolved_name in removed or (bool(added) and resolved_name is NO_MATCH)
+        )
+        if removed:
+            self._persist("forget_resolutions", sorted(removed))
+        logger.info(f"Service catalog changed ({len(added)} added, {len(removed)} removed), invalidated {dropped} cached name resolutions")
+
+    def _remember_match(self, service_name: str, best_match: str):
+        """Cache a resolution in memory and on disk"""
+        self._service_name_matching_cache.set(service_name, best_match)
+        self._persist("save_resolution", service_name, best_match)
+        if best_match != service_name:
+            # Resolved names map to themselves so callers can pass them back in cheaply
+            self._service_name_matching_cache.set(best_match, best_match)
+            self._persist("save_resolution", best_match, best_match)
+
+    def _service_index_for(self, service_names: list) -> ServiceNameIndex:
+        """Return the n-gram index for service_names, rebuilding it when the catalog changed"""
+        if self._service_index is None or self._service_index.source is not service_names:
+            self._service_index = ServiceNameIndex(service_names)
+        return self._service_index
+
+    @staticmethod
+    def _is_confident_match(ranked: list) -> bool:
+        """A top fuzzy match is confident if it scores high, or clearly beats the runner-up"""
+        if not ranked:
+            return False
+        top_score = ranked[0][1]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return top_score >= CONFIDENT_MATCH_SCORE or (
+            top_score >= CONFIDENT_MATCH_FLOOR and top_score - runner_up >= CONFIDENT_MATCH_MARGIN
+        )
+
+    async def _find_llm_match(self, service_name: str, service_names_available: list):
+        """Ask the LLM for the best match and record a valid answer in the matching cache"""
         system_prompt = f"""
         You are a helpful assistant that can find the best match for a given service name "{service_name}" from the list of available service names.
         The list of Coralogix service names available are: {service_names_available}.
@@ -153,39 +695,25 @@ class CoralogixClient:
                     best_match = response_json.get("service_name")
                     if best_match and best_match in service_names_available:
                         logger.info(f"LLM found match for service name: {service_name} -> {best_match}")
-                        self._service_name_matching_cache[service_name] = best_match
+                        self._remember_match(service_name, best_match)
                         return best_match
                 except json.JSONDecodeError:
                     logger.warning("Failed to parse LLM response as JSON")
         except Exception as e:
             logger.error(f"Error in LLM matching: {str(e)}")
-        
-        # Fallback to basic matching if LLM fails or returns invalid result
-        logger.info("Falling back to basic matching")
-        best_match = self.find_best_match_basic(service_name, service_names_available)
-        if best_match:
-            logger.info(f"Basic matching found match for service name: {service_name} -> {best_match}")
-            self._service_name_matching_cache[service_name] = best_match
-        else:
-            logger.warning(f"No match found for service name: {service_name}")
-        
-        return best_match
+        return None
     
     def find_best_match_basic(self, target: str, candidates: list):
-        """Basic fallback matching function when LLM is not available"""
+        """Basic fallback matching function when LLM is not available, answered from the n-gram index"""
         if not target or not candidates:
             return None
         
-        target = target.lower()
+        index = self._service_index_for(candidates)
+        exact_match = index.exact(target)
+        if exact_match:
+            return exact_match
         
-        for candidate in candidates:
-            if candidate.lower() == target:
-                return candidate
-        
-        partial_matches = [
-            c for c in candidates
-            if target in c.lower() or c.lower() in target
-        ]
+        partial_matches = index.substring_matches(target)
         
         if partial_matches:
             partial_matches.sort(key=len)
@@ -193,11 +721,13 @@ class CoralogixClient:
         
         return None
     
-    async def http_generate_query(self, service_name: str, query_type: str = None):
+    async def http_generate_query(self, service_name: str, query_type: str = None, bucket_by_minute: bool = False):
         """Generate a query for Coralogix DataPrime for HTTP requests
         Args:
             service_name: The service name to generate a query.
-            query_type: The type of query to generate. Can be "4xx", "5xx", "2xx", or "critical"
+            query_type: The type of query to generate. Can be "4xx", "5xx", "2xx", "all" (every status class in one
+                scan, see HTTP_OVERVIEW_RANGE), or "critical"
+            bucket_by_minute: Also group by the minute of each log, for incremental aggregation
         Returns:
             A string containing the query for Coralogix DataPrime
         """
@@ -215,24 +745,163 @@ class CoralogixClient:
         else:
             query += " | filter $l.subsystemname != null"
 
-        if query_type == "4xx":
-            query += " | filter ($d.status_code:num >= 400 && $d.status_code:num <= 499) | filter $d.http_method != null"
-        elif query_type == "5xx":
-            query += " | filter ($d.status_code:num >= 500 && $d.status_code:num <= 599) | filter $d.http_method != null"
-        elif query_type == "2xx":
-            query += " | filter ($d.status_code:num >= 200 && $d.status_code:num <= 399) | filter $d.http_method != null"
+        query += self._http_status_filter(query_type)
+        query += "| extract $d.path into $d using regexp(e=/(?<new_path>^[^?]+)(?:\\?.+)?/) "
+        if bucket_by_minute:
+            query += "| groupby roundTime($m.timestamp, 1m) as minute, $d.new_path, $d.http_method, $d.status_code:num aggregate count() as log_count"
         else:
-            query += " | filter $m.severity == CRITICAL"
+            query += "| groupby $d.new_path, $d.http_method, $d.status_code:num aggregate count() as log_count"
+        return query
 
-        query += (
-            "| extract $d.path into $d using regexp(e=/(?<new_path>^[^?]+)(?:\\?.+)?/) "
-            "| groupby $d.new_path, $d.http_method, $d.status_code:num aggregate count() as log_count"
-        )
+    @staticmethod
+    def _http_status_filter(query_type: Optional[str]) -> str:
+        status_range = HTTP_OVERVIEW_RANGE if query_type == "all" else STATUS_CLASS_RANGES.get(query_type)
+        if status_range:
+            low, high = status_range
+            return f" | filter ($d.status_code:num >= {low} && $d.status_code:num <= {high}) | filter $d.http_method != null"
+        return " | filter $m.severity == CRITICAL"
+
+    def http_generate_grouped_query(self, service_names: Optional[List[str]], query_type: str) -> str:
+        """Generate one DataPrime query for the HTTP statistics of several services, grouped by subsystem
+        Args:
+            service_names: Exact subsystem names, or None for every subsystem of the application
+            query_type: "2xx", "4xx", "5xx" or "all", see http_generate_query
+        Returns:
+            A query whose rows carry subsystemname next to the path, method, status and count
+        """
+        query = f"source logs | filter $l.applicationname == '{self.application_name}' "
+        if service_names is None:
+            query += "| filter $l.subsystemname != null"
+        else:
+            conditions = " || ".join(f"$l.subsystemname == '{name}'" for name in service_names)
+            query += f"| filter ({conditions})"
+        query += self._http_status_filter(query_type)
+        query += "| extract $d.path into $d using regexp(e=/(?<new_path>^[^?]+)(?:\\?.+)?/) "
+        query += "| groupby $l.subsystemname, $d.new_path, $d.http_method, $d.status_code:num aggregate count() as log_count"
         return query
 
-    async def search_generate_query(self, search_string: str, service_name: str = None):
+    async def resolve_service_names(self, service_names) -> Tuple[Dict[str, str], List[str]]:
+        """Resolve several requested service names in one pass, at most MAX_CONCURRENT_NAME_RESOLUTIONS at a time
+        Args:
+            service_names: List of names as an agent would write them, or "all" for every service in the catalog
+        Returns:
+            ({requested name: subsystem name}, [requested names without a match])
+        """
+        catalog = await self.fetch_service_names()
+        if isinstance(service_names, str):
+            if service_names.strip().lower() == "all":
+                return {name: name for name in catalog or []}, []
+            service_names = [name.strip() for name in service_names.split(",")]
+
+        requested = list(dict.fromkeys(name for name in service_names if name))
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_NAME_RESOLUTIONS)
+
+        async def resolve(name: str):
+            async with semaphore:
+                return await self.find_matching_coralogix_service_name(name)
+
+        matches = await asyncio.gather(*(resolve(name) for name in requested), return_exceptions=True)
+        resolved, unresolved = {}, []
+        for name, match in zip(requested, matches):
+            if isinstance(match, Exception) or not match:
+                unresolved.append(name)
+            else:
+                resolved[name] = match
+        return resolved, unresolved
+
+    async def search_http_logs_by_service(self, service_names: List[str], query_type: str, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None, all_services: bool = False) -> Optional[Dict[str, list]]:
+        """Fetch HTTP endpoint statistics of several services at once
+        Up to MAX_GROUPED_SERVICES services (or all_services) are answered by one query grouped by
+        subsystem; longer lists fan out per service, at most MAX_CONCURRENT_SERVICE_QUERIES at a time.
+        Args:
+            service_names: Exact subsystem names, e.g. from resolve_service_names
+            query_type: "2xx", "4xx", "5xx" or "all"
+            all_services: Query every subsystem of the application without listing them in the query
+        Returns:
+            {subsystem name: groupby rows}, with an empty list for services without matching logs and None
+            for services whose query failed, or None if the grouped query failed
+        """
+        if all_services or len(service_names) <= MAX_GROUPED_SERVICES:
+            query = self.http_generate_grouped_query(None if all_services else service_names, query_type)
+            rows = await self.search_coralogix_logs(query, time_range_minutes, start, end, tier, query_type="http")
+            if rows is None:
+                return None
+            by_service = {name: [] for name in service_names}
+            for row in rows:
+                by_service.setdefault(row.get("subsystemname"), []).append(row)
+            return by_service
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SERVICE_QUERIES)
+
+        async def search_service(name: str):
+            async with semaphore:
+                return await self.search_http_logs(name, query_type, time_range_minutes, start, end, tier)
+
+        results = await asyncio.gather(*(search_service(name) for name in service_names))
+        return dict(zip(service_names, results))
+
+    async def search_http_logs(self, service_name: str, query_type: str, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None):
+        """Fetch HTTP endpoint statistics for one status class ("2xx", "4xx" or "5xx").
+        When the combined overview for the same service and window is cached, the rows are
+        filtered out of it instead of sending another query."""
+        overview_query = await self.http_generate_query(service_name, query_type="all")
+        overview = self.peek_cached_results(overview_query, time_range_minutes, start, end, tier)
+        if overview is not None:
+            logger.info(f"Answering {query_type} statistics from the cached HTTP overview")
+            return [log for log in overview if status_class(log.get("status_code")) == query_type]
+
+        rolling_minutes = time_range_minutes or self.time_range_minutes
+        if self.incremental_http_stats and start is None and end is None and rolling_minutes <= HTTP_BUCKET_CAPACITY_MINUTES:
+            return await self._search_http_incremental(service_name, query_type, rolling_minutes, tier)
+
+        query = await self.http_generate_query(service_name, query_type=query_type)
+        return await self.search_coralogix_logs(query, time_range_minutes, start, end, tier, query_type="http")
+
+    async def _search_http_incremental(self, service_name: str, query_type: str, time_range_minutes: int, tier: Optional[str]):
+        """Answer a rolling-window HTTP stats query from per-minute buckets, fetching only the missing minutes"""
+        try:
+            start_time, end_time = self.query_window(time_range_minutes)
+        except ValueError as e:
+            logger.error(f"Error searching logs: {str(e)}")
+            return None
+
+        bucket_query = await self.http_generate_query(service_name, query_type=query_type, bucket_by_minute=True)
+        buckets = self._http_buckets.get(bucket_query)
+        if buckets is None:
+            buckets = MinuteBuckets(capacity_minutes=HTTP_BUCKET_CAPACITY_MINUTES)
+
+        missing = buckets.missing_range(start_time, end_time)
+        if missing:
+            fetch_start, fetch_end = missing
+            logger.info(f"Fetching HTTP buckets {format_timestamp(fetch_start)} to {format_timestamp(fetch_end)}")
+            rows = await self.search_coralogix_logs(bucket_query, start=format_timestamp(fetch_start), end=format_timestamp(fetch_end), tier=tier, query_type="http")
+            if rows is None:
+                return None
+            # Recent minutes may still receive late logs, so only older ones are sealed
+            sealed_until = floor_to_minute(datetime.now(timezone.utc)) - timedelta(minutes=BUCKET_SEAL_LAG_MINUTES)
+            buckets.update(fetch_start, fetch_end, rows, sealed_until)
+        self._http_buckets.set(bucket_query, buckets)
+
+        return buckets.rollup(start_time, end_time)
+
+    async def search_http_overview(self, service_name: str, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None):
+        """Fetch endpoint statistics for every HTTP status class with a single groupby query.
+        Returns a {"2xx": rows, "4xx": rows, "5xx": rows} dict, or None if the query failed."""
+        query = await self.http_generate_query(service_name, query_type="all")
+        logs = await self.search_coralogix_logs(query, time_range_minutes, start, end, tier, query_type="http")
+        if logs is None:
+            return None
+
+        by_class = {name: [] for name in STATUS_CLASS_RANGES}
+        for log in logs:
+            name = status_class(log.get("status_code"))
+            if name:
+                by_class[name].append(log)
+        return by_class
+
+    async def search_generate_query(self, search_string: str, service_name: str = None, limit: Optional[int] = 100):
         """Generate a query for Coralogix DataPrime for search string in logs by service name if provided, otherwise search all logs in the application using the 
-        filter $l.subsystemname != null """
+        filter $l.subsystemname != null. With limit=None the query is unbounded and ordered newest first, for search cursors."""
         
         service_name = await self.find_matching_coralogix_service_name(service_name)
         if not service_name:
@@ -264,112 +933,293 @@ class CoralogixClient:
         if search_conditions:
             query += " | filter (" + " && ".join(search_conditions) + ")"
         
-        query += " | limit 100"
+        if limit is None:
+            query += " | orderby $m.timestamp desc"
+        query += PROJECTED_LOG_FIELDS
+        if limit is not None:
+            query += f" | limit {limit}"
 
         return query
 
-    async def search_coralogix_logs(self, query: str):
-        """Search Coralogix logs for error details by service name if provided, otherwise search all logs in the application"""
+    async def search_logs_page(self, search_string: Optional[str] = None, service_name: Optional[str] = None, cursor: Optional[str] = None, page_size: int = SEARCH_PAGE_SIZE, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None) -> Optional[Dict]:
+        """Return one page of a log search, newest first, with a continuation token for the next page
+        Args:
+            search_string: String to search for, see search_generate_query. Ignored when cursor is given.
+            service_name: Optional service to search. Ignored when cursor is given.
+            cursor: Continuation token returned with a previous page
+            page_size: Records per page, capped at MAX_SEARCH_PAGE_SIZE
+            time_range_minutes, start, end, tier: Window and tier of a new search, see query_window and select_tier
+        Returns:
+            A dict with the page "results", its "offset", the "next_cursor" token (None after the last page)
+            and whether the search hit MAX_CURSOR_RESULTS ("truncated"), or None if a query failed
+        Raises:
+            ValueError: If the cursor is malformed, has expired, or no search_string was given
+        """
+        page_size = max(1, min(page_size or SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE))
+        if cursor:
+            position = decode_cursor_token(cursor, self._cursor_key)
+            offset = position.offset
+            search_cursor = self._cursors.get(position.cursor_id)
+            if search_cursor is None or offset < search_cursor.base_offset:
+                # Opened by another worker, or evicted here: resume from the token alone
+                search_cursor = SearchCursor.from_position(position, MAX_CURSOR_RESULTS)
+        else:
+            if not search_string:
+                raise ValueError("search_string is required to start a search")
+            query = await self.search_generate_query(search_string, service_name, limit=None)
+            start_time, end_time = self.query_window(time_range_minutes, start, end)
+            search_cursor = SearchCursor(query, start_time, end_time, self.select_tier(start_time, end_time, tier), MAX_CURSOR_RESULTS)
+            offset = 0
+
+        first = offset - search_cursor.base_offset
+        async with search_cursor.lock:
+            if not await self._fill_cursor(search_cursor, first + page_size):
+                return None
+        # Every page read restarts the cursor's expiry
+        self._cursors.set(search_cursor.id, search_cursor)
+
+        page = search_cursor.records[first:first + page_size]
+        next_offset = offset + len(page)
+        next_cursor = None
+        if search_cursor.has_more(next_offset):
+            next_cursor = encode_cursor_token(search_cursor.position(next_offset, CURSOR_TTL, record_time), self._cursor_key)
+        return {
+            "results": page,
+            "offset": offset,
+            "next_cursor": next_cursor,
+            "truncated": search_cursor.truncated
+        }
+
+    async def _fill_cursor(self, cursor: SearchCursor, needed: int) -> bool:
+        """Fetch chunks into the cursor until it holds needed records or its window is exhausted"""
+        while len(cursor.records) < needed and not cursor.exhausted:
+            metadata = self.build_metadata(cursor.start_time, cursor.end_time, cursor.tier)
+            # A resumed cursor also reads the newest records it already served, then drops them
+            fetch_size = CURSOR_FETCH_SIZE + cursor.skip
+            chunk = await self._execute_query(f"{cursor.query} | limit {fetch_size}", metadata)
+            if chunk is None:
+                return False
+
+            chunk = merge_by_timestamp([chunk])
+            if len(chunk) < fetch_size:
+                cursor.exhausted = True
+            else:
+                # Logs sharing the oldest timestamp may continue past the limit, so they are
+                # dropped here and read again by the next chunk, which ends just after it
+                oldest = chunk[-1].get("timestamp")
+                boundary = record_time(chunk[-1])
+                newer = [record for record in chunk if record.get("timestamp") != oldest]
+                if boundary is None or not newer or boundary <= cursor.start_time:
+                    logger.warning(f"Cannot page past {oldest}, search results are truncated")
+                    cursor.exhausted = cursor.truncated = True
+                else:
+                    chunk = newer
+                    cursor.end_time = boundary + timedelta(microseconds=1)
+            chunk = chunk[cursor.skip:]
+            cursor.skip = 0
+
+            room = cursor.max_results - len(cursor.records)
+            if len(chunk) >= room and not cursor.exhausted:
+                cursor.exhausted = cursor.truncated = True
+            cursor.records.extend(chunk[:room])
+        return True
+
+    async def search_coralogix_logs(self, query: str, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None, query_type: Optional[str] = None):
+        """Search Coralogix logs for error details by service name if provided, otherwise search all logs in the application.
+        The time window is computed per call, see query_window. Successful results are cached per
+        (query, window, tier) for the TTL configured for query_type in QUERY_CACHE_TTLS, and
+        concurrent callers with the same key share a single request. Windows longer than
+        SHARD_THRESHOLD_MINUTES are split into aligned shards, see _search_sharded."""
+        try:
+            start_time, end_time = self.query_window(time_range_minutes, start, end)
+            # Validates a tier override up front
+            self.select_tier(start_time, end_time, tier)
+        except ValueError as e:
+            logger.error(f"Error searching logs: {str(e)}")
+            return None
+
+        if end_time - start_time > timedelta(minutes=SHARD_THRESHOLD_MINUTES):
+            return await self._search_sharded(query, start_time, end_time, tier, query_type)
+        return await self._search_window(query, start_time, end_time, tier, query_type)
+
+    async def _search_window(self, query: str, start_time: datetime, end_time: datetime, tier: Optional[str], query_type: Optional[str]):
+        """Run one query over one window through the result cache and request coalescing"""
+        metadata = self.build_metadata(start_time, end_time, tier)
+        cache_key = self._query_cache_key(query, metadata)
+        cached_results = self.query_cache.get(cache_key)
+        if cached_results is not None:
+            logger.info(f"Returning cached results for query: {query}")
+            return cached_results
+
+        async def fetch_and_cache():
+            shared = await self._load_shared_results(cache_key)
+            if shared is not None:
+                results, ttl = shared
+                logger.info(f"Returning results shared by another worker for query: {query}")
+                self.query_cache.set(cache_key, results, ttl=ttl)
+                return results
+
+            results = await self._execute_query(query, metadata)
+            if results is not None:
+                ttl = self._result_ttl(end_time, query_type)
+                self.query_cache.set(cache_key, results, ttl=ttl)
+                await self._save_shared_results(cache_key, results, ttl)
+            return results
+
+        # Concurrent identical searches share one in-flight request
+        return await self._inflight.do(cache_key, fetch_and_cache)
+
+    async def _search_sharded(self, query: str, start_time: datetime, end_time: datetime, tier: Optional[str], query_type: Optional[str]):
+        """Split a long window into aligned shards, query them concurrently and merge the results.
+        Shards are cached on their own, so an overlapping later window only fetches new shards."""
+        metadata = self.build_metadata(start_time, end_time, tier)
+        cache_key = self._query_cache_key(query, metadata)
+        cached_results = self.query_cache.get(cache_key)
+        if cached_results is not None:
+            logger.info(f"Returning cached results for query: {query}")
+            return cached_results
+
+        shards = time_shards(start_time, end_time, SHARD_MINUTES)
+        logger.info(f"Splitting {format_timestamp(start_time)} to {format_timestamp(end_time)} into {len(shards)} shards")
+        semaphore = asyncio.Semaphore(self.max_concurrent_shards)
+
+        # The tier suits the whole window; a short shard picking its own would query frequent search
+        window_tier = metadata["tier"]
+
+        async def run_shard(shard_start: datetime, shard_end: datetime):
+            async with semaphore:
+                return await self._search_window(query, shard_start, shard_end, window_tier, query_type)
+
+        shard_results = await asyncio.gather(*(run_shard(shard_start, shard_end) for shard_start, shard_end in shards))
+        if any(results is None for results in shard_results):
+            logger.error(f"{sum(results is None for results in shard_results)} of {len(shards)} shards failed")
+            return None
+
+        if query_type == "http":
+            merged = merge_groupby_counts(shard_results)
+        else:
+            merged = merge_by_timestamp(shard_results, query_limit(query))
+        self.query_cache.set(cache_key, merged, ttl=self._result_ttl(end_time, query_type))
+        return merged
+
+    def _result_ttl(self, end_time: datetime, query_type: Optional[str]) -> float:
+        """Windows that ended before the ingestion lag no longer change and are kept longer"""
+        if datetime.now(timezone.utc) - end_time >= timedelta(minutes=SEALED_WINDOW_LAG_MINUTES):
+            return QUERY_CACHE_TTLS["sealed"]
+        return QUERY_CACHE_TTLS.get(query_type, QUERY_CACHE_TTLS["default"])
+
+    def _record_query_latency(self, tier: str, elapsed: float):
+        tier_stats = self._tier_stats.setdefault(tier, {"queries": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        tier_stats["queries"] += 1
+        tier_stats["total_seconds"] += elapsed
+        tier_stats["max_seconds"] = max(tier_stats["max_seconds"], elapsed)
+
+    def stats(self) -> Dict:
+        """Return instrumentation counters: query latency per tier, result cache, request coalescing,
+        search cursors, and the transport's retries, circuit breaker and rate limiter"""
+        return {
+            "tiers": {
+                tier: dict(tier_stats, avg_seconds=tier_stats["total_seconds"] / tier_stats["queries"])
+                for tier, tier_stats in self._tier_stats.items()
+            },
+            "query_cache": self.query_cache.stats(),
+            "coalescing": self._inflight.stats(),
+            "cursors": self._cursors.stats(),
+            "transport": self.transport.stats()
+        }
+
+    @staticmethod
+    def _query_cache_key(query: str, metadata: Dict) -> tuple:
+        return (query, metadata["startTime"], metadata["endTime"], metadata["tier"])
+
+    def peek_cached_results(self, query: str, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None):
+        """Return cached results for query over the given window without sending a request, or None"""
+        try:
+            start_time, end_time = self.query_window(time_range_minutes, start, end)
+            metadata = self.build_metadata(start_time, end_time, tier)
+        except ValueError:
+            return None
+        cache_key = self._query_cache_key(query, metadata)
+        if cache_key not in self.query_cache:
+            return None
+        return self.query_cache.get(cache_key)
+
+    async def _execute_query(self, query: str, metadata: Dict):
+        """Send a DataPrime query and decode the result records"""
         try:
-            end_time_str = self.end_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            start_time_str = self.start_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            
             payload = {
                 "query": query,
-                "metadata": self.metadata
+                "metadata": metadata
             }
             
             # Enhanced logging
             logger.info("=== Coralogix API Request Details for search_coralogix_logs ===")
             logger.info(f"URL: {CORALOGIX_API_URL}")
-            logger.info(f"Time Range: {start_time_str} to {end_time_str}")
+            logger.info(f"Time Range: {metadata['startTime']} to {metadata['endTime']}")
+            logger.info(f"Tier: {metadata['tier']}")
             logger.info(f"Query: {query}")
             
-            response = requests.post(
-                CORALOGIX_API_URL,
-                headers=self.headers,
-                json=payload,
-                timeout=60
-            )
-            
-            if response.ok:
-                try:
-                    json_lines = [line.strip() for line in response.text.split('\n') if line.strip()]
-                    if len(json_lines) >= 2:
-                        results_json = json.loads(json_lines[1])
-                        log_results = results_json.get("result", {}).get("results", [])
-                        
-                        if not log_results:
-                            logger.info("No logs found for the given time period")
-                            return []
-                        
-                        user_data_list = []
-                        for log in log_results:
-                            log_record = log.get("logRecord", {})
-                            if isinstance(log_record, dict):
-                                body = log_record.get("body", {})
-                                if isinstance(body, dict):
-                                    log_text = body.get("log", None)
-                                    if log_text:
-                                        try:
-                                            user_data = json.loads(log_text)
-                                            user_data_list.append(user_data)
-                                            continue
-                                        except Exception:
-                                            pass
-                            # Fallback to userData
-                            user_data = json.loads(log.get("userData", "{}"))
-                            user_data_list.append(user_data)
-                        logger.info(f"Found {len(user_data_list)} log entries")
-                        return user_data_list
-                    logger.info("No logs found in response")
-                    return []
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error parsing response: {e}")
-                    return None
-            else:
-                logger.error(f"API error: {response.status_code} - {response.text}")
-                return None
+            started = time.monotonic()
+            try:
+                # DataPrime queries are read-only, so they are always safe to retry
+                return await self.transport.run(lambda: self._stream_query(payload))
+            finally:
+                elapsed = time.monotonic() - started
+                self._record_query_latency(metadata["tier"], elapsed)
+                logger.info(f"Query on {metadata['tier']} finished in {elapsed * 1000:.0f} ms")
         except Exception as e:
             logger.error(f"Error searching logs: {str(e)}")
             return None
 
-    async def analyze_logs(self, user_data_list: list):
-        """Analyze logs and show top 10 API endpoints with counts"""
-        if not user_data_list or not isinstance(user_data_list, list):
+    async def _stream_query(self, payload: Dict):
+        """POST a DataPrime payload and decode the streamed result records"""
+        async with self.http.stream("POST", CORALOGIX_API_URL, json=payload) as response:
+            if not response.is_success:
+                await response.aread()
+                logger.error(f"API error: {response.status_code} - {response.text}")
+                self._raise_for_retryable(response)
+                return None
+
+            user_data_list = []
+            try:
+                # Records are decoded batch by batch as the body streams in
+                async for log in iter_dataprime_results(response.aiter_bytes()):
+                    # The inner log payload is only decoded when a consumer reads it
+                    user_data_list.append(LazyRecord(log))
+            except jsonlib.JSONDecodeError as e:
+                logger.error(f"Error parsing response: {e}")
+                return None
+
+        if not user_data_list:
+            logger.info("No logs found for the given time period")
+            return []
+
+        logger.info(f"Found {len(user_data_list)} log entries")
+        return user_data_list
+
+    @staticmethod
+    def _raise_for_retryable(response: httpx.Response):
+        """Hand throttling and server errors to the transport policy so they are retried"""
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            raise RetryableStatusError(response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+
+    async def analyze_logs(self, user_data_list, top_k: int = TOP_APIS_LIMIT):
+        """Analyze logs and show the top_k API endpoints with counts
+        Args:
+            user_data_list: HTTP groupby rows, or an EndpointAggregator holding partial aggregates
+                merged from several batches. Rows for the same endpoint are summed.
+            top_k: Number of endpoints returned
+        """
+        if isinstance(user_data_list, EndpointAggregator):
+            aggregator = user_data_list
+        elif not user_data_list or not isinstance(user_data_list, list):
             return {"summary": "No logs found for analysis"}
-        
-        api_counts = {}
-        total_requests = 0
-        
-        for log in user_data_list:
-            path = log.get("new_path", "")
-            if not path or path == "unknown":
-                continue
-                
-            count = int(log.get("log_count", 0))
-            method = log.get("http_method", "")
-            status = log.get("status_code", "")
-            
-            key = f"{path}|{method}|{status}"
-            api_counts[key] = {
-                "http_method": method,
-                "log_count": count,
-                "new_path": path,
-                "status_code": status
-            }
-            total_requests += count
-        
-        # Get top 15 by count
-        top_apis = sorted(
-            api_counts.values(),
-            key=lambda x: x["log_count"],
-            reverse=True
-        )[:15]
-        
+        else:
+            aggregator = EndpointAggregator().add_rows(user_data_list)
+
         return {
-            "total_requests": total_requests,
-            "top_apis": top_apis
+            "total_requests": aggregator.total_requests,
+            "top_apis": aggregator.top(top_k)
         }
 
     async def get_log_context(self, user_data_list: list, search_string: str, context_lines: int = 10):
@@ -382,16 +1232,7 @@ class CoralogixClient:
                     logger.warning(f"expected dict but got str: {log[:100]}...")
                     continue
                 
-                log_record = log.get("logRecord", {})
-                if isinstance(log_record, str):
-                    continue
-                
-                body = log_record.get("body", {})
-                if isinstance(body, str):
-                    log_text = body
-                else:
-                    log_text = body.get("log", "")
-
+                log_text = extract_log_text(log)
                 if not log_text:
                     continue
                 
@@ -441,8 +1282,8 @@ class CoralogixClient:
 
         return analysis
 
-    async def search_recent_error_logs(self, service_name: str = None):
-        """Search error logs within a 2-minute time window from the current time and return detailed error messages"""
+    async def search_recent_error_logs(self, service_name: str = None, time_range_minutes: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None, tier: Optional[str] = None):
+        """Search CRITICAL logs within the query window and return detailed error messages"""
         # TODO: Add error type filter
         service_name = await self.find_matching_coralogix_service_name(service_name)
         if not service_name:
@@ -452,7 +1293,8 @@ class CoralogixClient:
             if service_name:
                 query += f" | filter $l.subsystemname == '{service_name}'"
             query += " | filter ($m.severity == CRITICAL)"
-            results = await self.search_coralogix_logs(query)
+            query += PROJECTED_LOG_FIELDS
+            results = await self.search_coralogix_logs(query, time_range_minutes, start, end, tier, query_type="critical")
             if not results:
                 return []
                 
@@ -462,16 +1304,7 @@ class CoralogixClient:
                     if isinstance(log, str):
                         continue
                         
-                    log_record = log.get("logRecord", {})
-                    if isinstance(log_record, str):
-                        continue
-                        
-                    body = log_record.get("body", {})
-                    if isinstance(body, str):
-                        log_text = body
-                    else:
-                        log_text = body.get("log", "")
-                        
+                    log_text = extract_log_text(log)
                     if not log_text:
                         continue
                         
@@ -501,7 +1334,7 @@ class CoralogixClient:
     
     async def call_llm(self, prompt: str):
         """
-        Call LLM using LiteLLM to find matching names.
+        Call LLM using LiteLLM's async completion API to find matching names.
         
         Args:
             prompt (str): The prompt to send to the LLM
@@ -509,8 +1342,9 @@ class CoralogixClient:
         Returns:
             str: JSON string containing the LLM's response with coralogix service_name
         """
+        hard_timeout = self.llm_timeout * LLM_HARD_TIMEOUT_FACTOR
         try:
-            response = completion(
+            response = await asyncio.wait_for(acompletion(
                 model=self.model,
                 api_key=self.openai_api_key,
                 messages=[
@@ -525,8 +1359,9 @@ class CoralogixClient:
                 ],
                 max_tokens=500,
                 temperature=0.1,
-                response_format={"type": "json_object"}
-            )
+                response_format={"type": "json_object"},
+                timeout=hard_timeout
+            ), hard_timeout)
 
             response_content = response.choices[0].message.content            
             try:
@@ -535,6 +1370,9 @@ class CoralogixClient:
             except json.JSONDecodeError as e:
                 logger.error(f"Error parsing JSON response: {str(e)}")
                 return None
+        except asyncio.TimeoutError:
+            logger.error(f"LLM call did not finish within {hard_timeout}s, giving up")
+            return None
         except Exception as e:
             logger.error(f"Error llm calling: {str(e)}")
             return None
\ No newline at end of file
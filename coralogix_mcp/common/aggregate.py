@@ -0,0 +1,120 @@
+"""Accumulating per-endpoint request counts with a heap-based top-K."""
+import heapq
+import itertools
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+EndpointKey = Tuple
+
+# Distinct endpoints tracked exactly before the least counted ones start being merged
+DEFAULT_MAX_ENDPOINTS = 10000
+
+# Group fields of the HTTP groupby rows; per-service queries add subsystemname
+ENDPOINT_FIELDS = ("new_path", "http_method", "status_code")
+
+
+class EndpointAggregator:
+    """
+    Sum HTTP groupby rows per (path, method, status) across batches, shards or services.
+
+    Up to max_endpoints distinct endpoints are counted exactly. Past that, memory stays
+    bounded with the Space-Saving scheme: a new endpoint replaces the least counted one
+    and inherits its count, which is recorded as the new entry's possible overcount.
+    Heavy endpoints are never dropped, so the top-K stays correct for skewed traffic, and
+    rows of merged endpoints report how much their count may be overstated.
+
+    Args:
+        max_endpoints: Maximum number of endpoints kept in memory. With at least as many as
+            the distinct groups added, the counts are exact.
+        fields: Row fields that identify a group
+    """
+
+    def __init__(self, max_endpoints: int = DEFAULT_MAX_ENDPOINTS, fields: Sequence[str] = ENDPOINT_FIELDS):
+        if max_endpoints <= 0:
+            raise ValueError("max_endpoints must be positive")
+        self.max_endpoints = max_endpoints
+        self.fields = tuple(fields)
+        self.total_requests = 0
+        self._counts: Dict[EndpointKey, int] = {}
+        self._errors: Dict[EndpointKey, int] = {}
+        # Min-heap of (count, tiebreak, key), only kept once the table is full; entries whose
+        # count is out of date are skipped lazily and compacted away
+        self._heap: List[Tuple[int, int, EndpointKey]] = []
+        self._tiebreak = itertools.count()
+
+    def add(self, path: str, method: str, status, count: int) -> None:
+        """Add count requests for one endpoint, with the default ENDPOINT_FIELDS"""
+        self.add_group((path, method, status), count)
+
+    def add_group(self, key: EndpointKey, count: int) -> None:
+        """Add count requests for the group whose values of fields are key"""
+        self.total_requests += count
+        self._increment(key, count, 0)
+
+    def add_rows(self, rows: Iterable[Mapping], skip_unknown_paths: bool = True) -> "EndpointAggregator":
+        """Add groupby rows carrying fields and log_count, by default skipping rows without a path"""
+        for row in rows:
+            if skip_unknown_paths:
+                path = row.get("new_path", "")
+                if not path or path == "unknown":
+                    continue
+            self.add_group(tuple(row.get(field, "") for field in self.fields), int(row.get("log_count", 0)))
+        return self
+
+    def merge(self, other: "EndpointAggregator") -> "EndpointAggregator":
+        """Fold the counts of another aggregator, e.g. of a separate batch, into this one"""
+        self.total_requests += other.total_requests
+        for key, count in other._counts.items():
+            self._increment(key, count, other._errors.get(key, 0))
+        return self
+
+    def _increment(self, key: EndpointKey, count: int, error: int) -> None:
+        if key in self._counts:
+            self._counts[key] += count
+            self._errors[key] += error
+        elif len(self._counts) < self.max_endpoints:
+            self._counts[key] = count
+            self._errors[key] = error
+        else:
+            floor_key, floor = self._pop_min()
+            del self._counts[floor_key]
+            del self._errors[floor_key]
+            self._counts[key] = floor + count
+            self._errors[key] = floor + error
+            heapq.heappush(self._heap, (self._counts[key], next(self._tiebreak), key))
+            return
+
+        if self._heap:
+            heapq.heappush(self._heap, (self._counts[key], next(self._tiebreak), key))
+            if len(self._heap) > 2 * self.max_endpoints:
+                self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(count, next(self._tiebreak), key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[EndpointKey, int]:
+        if not self._heap:
+            self._rebuild_heap()
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return key, count
+
+    def _row(self, key: EndpointKey, count: int) -> Dict:
+        row = dict(zip(self.fields, key), log_count=count)
+        if self._errors[key]:
+            row["max_overcount"] = self._errors[key]
+        return row
+
+    def top(self, k: int) -> List[Dict]:
+        """Return the k busiest groups as groupby-shaped dicts, busiest first. Rows whose count may
+        include merged-away groups carry that upper bound as max_overcount."""
+        best = heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+        return [self._row(key, count) for key, count in best]
+
+    def rows(self) -> List[Dict]:
+        """Return every group as a groupby-shaped dict, in no particular order"""
+        return [self._row(key, count) for key, count in self._counts.items()]
+
+    def __len__(self) -> int:
+        return len(self._counts)
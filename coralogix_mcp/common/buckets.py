@@ -0,0 +1,107 @@
+"""Per-minute ring buffer of HTTP groupby counts for incremental sliding-window stats."""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from coralogix_mcp.common.aggregate import EndpointAggregator, EndpointKey
+from coralogix_mcp.common.logger import setup_logger
+
+logger = setup_logger('coralogix_mcp')
+
+MINUTE = timedelta(minutes=1)
+
+
+def parse_bucket_minute(value) -> Optional[datetime]:
+    """
+    Parse a minute bucket value returned by DataPrime into a UTC datetime.
+
+    Accepts ISO-8601 strings and epoch numbers in seconds, milliseconds or nanoseconds.
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str) and not value.replace(".", "", 1).isdigit():
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+        else:
+            epoch = float(value)
+            for threshold, divisor in ((1e17, 1e9), (1e14, 1e6), (1e11, 1e3)):
+                if abs(epoch) >= threshold:
+                    epoch /= divisor
+                    break
+            parsed = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return parsed.astimezone(timezone.utc).replace(second=0, microsecond=0)
+
+
+class MinuteBuckets:
+    """
+    Ring buffer of (path, method, status) -> count buckets, one per minute.
+
+    Minutes before sealed_until are complete and never refetched; newer minutes are
+    replaced on every fetch because late logs may still arrive for them.
+
+    Args:
+        capacity_minutes: Number of most recent minutes kept
+    """
+
+    def __init__(self, capacity_minutes: int = 60):
+        self.capacity_minutes = capacity_minutes
+        self._minutes: Dict[datetime, Dict[EndpointKey, int]] = {}
+        self.fetched_from: Optional[datetime] = None
+        self.sealed_until: Optional[datetime] = None
+
+    def missing_range(self, start: datetime, end: datetime) -> Optional[Tuple[datetime, datetime]]:
+        """Return the [start, end) range that still has to be fetched for the window, or None"""
+        if self.sealed_until is None or self.fetched_from is None or start < self.fetched_from or self.sealed_until <= start:
+            return start, end
+        if self.sealed_until >= end:
+            return None
+        return self.sealed_until, end
+
+    def update(self, fetch_start: datetime, fetch_end: datetime, rows: Iterable[Mapping], sealed_until: datetime) -> None:
+        """Replace the buckets in [fetch_start, fetch_end) with rows and advance the sealed mark"""
+        minute = fetch_start
+        while minute < fetch_end:
+            self._minutes[minute] = {}
+            minute += MINUTE
+
+        for row in rows:
+            minute = parse_bucket_minute(row.get("minute"))
+            if minute is None or not fetch_start <= minute < fetch_end:
+                logger.warning(f"Skipping HTTP bucket row with unusable minute: {row.get('minute')}")
+                continue
+            key = (row.get("new_path"), row.get("http_method"), row.get("status_code"))
+            bucket = self._minutes[minute]
+            bucket[key] = bucket.get(key, 0) + int(row.get("log_count", 0))
+
+        contiguous = self.sealed_until is not None and self.fetched_from is not None and fetch_start <= self.sealed_until
+        if contiguous:
+            self.fetched_from = min(self.fetched_from, fetch_start)
+        else:
+            self.fetched_from = fetch_start
+        sealed_until = max(min(sealed_until, fetch_end), fetch_start)
+        if not contiguous or sealed_until > self.sealed_until:
+            self.sealed_until = sealed_until
+        self._evict(fetch_end)
+
+    def _evict(self, newest: datetime) -> None:
+        oldest = newest - timedelta(minutes=self.capacity_minutes)
+        for minute in [minute for minute in self._minutes if minute < oldest]:
+            del self._minutes[minute]
+        if self.fetched_from is not None and self.fetched_from < oldest:
+            self.fetched_from = oldest
+        if self.sealed_until is not None and self.sealed_until < oldest:
+            self.fetched_from = None
+            self.sealed_until = None
+
+    def rollup(self, start: datetime, end: datetime) -> List[Dict]:
+        """Sum the buckets in [start, end) into groupby-shaped rows"""
+        buckets = [bucket for minute, bucket in self._minutes.items() if start <= minute < end]
+        # Sized for every bucket entry, so the sums are exact
+        aggregator = EndpointAggregator(max_endpoints=max(1, sum(len(bucket) for bucket in buckets)))
+        for bucket in buckets:
+            for key, count in bucket.items():
+                aggregator.add_group(key, count)
+        return aggregator.rows()
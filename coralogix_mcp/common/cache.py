@@ -0,0 +1,161 @@
+"""In-process TTL + LRU cache used for Coralogix query results."""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a per-entry TTL.
+
+    Args:
+        maxsize: Maximum number of entries kept before the least recently used one is evicted
+        default_ttl: TTL in seconds applied when set() is called without one
+        timer: Monotonic clock, overridable for tests
+    """
+
+    def __init__(self, maxsize: int = 256, default_ttl: float = 60.0, timer: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._timer = timer
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds, evicting the least recently used entry when full"""
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (self._timer() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which predicate(key, value) is true, returning how many were dropped"""
+        stale = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self._timer()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TenantCacheView:
+    """
+    One tenant's share of a TTLCache used by several tenants.
+
+    Keys are namespaced by tenant, and a tenant holding more than quota live entries
+    evicts its own least recently written entry, so one busy tenant cannot push every
+    other tenant out of the shared cache.
+
+    Args:
+        cache: The shared cache
+        tenant: Namespace of this view's keys
+        quota: Maximum number of entries this tenant may hold
+    """
+
+    def __init__(self, cache: TTLCache, tenant: str, quota: int):
+        if quota <= 0:
+            raise ValueError("quota must be positive")
+        self.cache = cache
+        self.tenant = tenant
+        self.quota = quota
+        self._keys: "OrderedDict[Hashable, None]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.cache.get((self.tenant, key), default)
+        if value is default:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.cache.set((self.tenant, key), value, ttl)
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.quota:
+            # Entries the shared cache already evicted or expired do not count
+            for stale in [stale for stale in self._keys if (self.tenant, stale) not in self.cache]:
+                del self._keys[stale]
+        while len(self._keys) > self.quota:
+            oldest, _ = self._keys.popitem(last=False)
+            self.cache.invalidate((self.tenant, oldest))
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._keys.pop(key, None)
+        self.cache.invalidate((self.tenant, key))
+
+    def clear(self) -> None:
+        for key in self._keys:
+            self.cache.invalidate((self.tenant, key))
+        self._keys.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return this tenant's counters and size next to the shared cache's size"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "quota": self.quota,
+            "shared_size": len(self.cache),
+            "shared_maxsize": self.cache.maxsize
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return (self.tenant, key) in self.cache
+
+    def __len__(self) -> int:
+        return sum(1 for key in self._keys if (self.tenant, key) in self.cache)
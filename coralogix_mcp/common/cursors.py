@@ -0,0 +1,147 @@
+"""Server-side cursors for paging through large log searches."""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Mapping, NamedTuple, Optional
+
+
+class CursorPosition(NamedTuple):
+    """
+    Everything needed to resume a search at one offset, in any process.
+
+    The records before offset are the skip newest records of the window
+    [start_time, end_time), plus every record from end_time on.
+    """
+    cursor_id: str
+    offset: int
+    query: str
+    start_time: datetime
+    end_time: datetime
+    tier: str
+    skip: int
+    expires_at: float
+
+
+def encode_cursor_token(position: CursorPosition, key: bytes) -> str:
+    """Return the opaque continuation token of position, signed with key"""
+    payload = json.dumps({
+        "id": position.cursor_id,
+        "o": position.offset,
+        "q": position.query,
+        "s": position.start_time.isoformat(),
+        "e": position.end_time.isoformat(),
+        "t": position.tier,
+        "k": position.skip,
+        "x": position.expires_at
+    }, separators=(",", ":")).encode()
+    signature = hmac.new(key, payload, hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(signature + payload).decode().rstrip("=")
+
+
+def decode_cursor_token(token: str, key: bytes) -> CursorPosition:
+    """
+    Read back the position of a token made by encode_cursor_token with the same key.
+
+    Raises:
+        ValueError: If the token is malformed, was not signed with key, or has expired
+    """
+    try:
+        raw = base64.urlsafe_b64decode((token + "=" * (-len(token) % 4)).encode())
+        signature, payload = raw[:16], raw[16:]
+        if not hmac.compare_digest(signature, hmac.new(key, payload, hashlib.sha256).digest()[:16]):
+            raise ValueError
+        fields = json.loads(payload)
+        position = CursorPosition(
+            cursor_id=str(fields["id"]),
+            offset=int(fields["o"]),
+            query=str(fields["q"]),
+            start_time=datetime.fromisoformat(fields["s"]),
+            end_time=datetime.fromisoformat(fields["e"]),
+            tier=str(fields["t"]),
+            skip=int(fields["k"]),
+            expires_at=float(fields["x"])
+        )
+    except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+        raise ValueError("Malformed search cursor") from None
+    if position.offset < 0 or position.skip < 0:
+        raise ValueError("Malformed search cursor")
+    if position.expires_at < time.time():
+        raise ValueError("Search cursor has expired, start a new search")
+    return position
+
+
+class SearchCursor:
+    """
+    Results of one search, fetched from Coralogix in chunks as pages are requested.
+
+    The query window is fixed when the cursor is opened. Each chunk is read newest first and
+    the window end then moves back to the oldest timestamp seen, so later chunks continue
+    where the previous one stopped instead of re-running the whole search. Tokens carry an
+    offset, so requesting the same page twice returns the same results, and the window
+    left to read, so a process that does not hold the cursor, such as another worker, can
+    resume it with from_position.
+
+    Args:
+        query: DataPrime query without a limit, ordered newest first
+        start_time: Window start
+        end_time: Window end, moved back as chunks are fetched
+        tier: Resolved DataPrime tier
+        max_results: Upper bound on records kept for the cursor
+    """
+
+    def __init__(self, query: str, start_time: datetime, end_time: datetime, tier: str, max_results: int):
+        self.id = secrets.token_urlsafe(12)
+        self.query = query
+        self.start_time = start_time
+        self.end_time = end_time
+        self.tier = tier
+        self.max_results = max_results
+        self.records: List = []
+        self.exhausted = False
+        self.truncated = False
+        self.lock = asyncio.Lock()
+        # Offset of records[0], and the window and skip it was read with: a resumed cursor
+        # starts past the records another process already served
+        self.base_offset = 0
+        self.base_end_time = end_time
+        self.base_skip = 0
+        # Newest records of the next chunk that were already served
+        self.skip = 0
+
+    @classmethod
+    def from_position(cls, position: CursorPosition, max_results: int) -> "SearchCursor":
+        """Rebuild a cursor from a token's position, to serve the records from its offset on"""
+        cursor = cls(position.query, position.start_time, position.end_time, position.tier, max(0, max_results - position.offset))
+        cursor.id = position.cursor_id
+        cursor.base_offset = position.offset
+        cursor.base_skip = cursor.skip = position.skip
+        return cursor
+
+    def position(self, offset: int, ttl: float, record_time: Callable[[Mapping], Optional[datetime]]) -> CursorPosition:
+        """
+        Return the resumable position of offset, which must lie within the fetched records.
+
+        The window is cut just after the timestamp of the record at offset, so only the
+        records sharing that timestamp have to be skipped on resume.
+        """
+        relative = offset - self.base_offset
+        end_time, skip = self.base_end_time, self.base_skip + relative
+        if relative == len(self.records) and self.records:
+            end_time, skip = self.end_time, self.skip
+        elif 0 < relative < len(self.records):
+            newest = record_time(self.records[relative])
+            group = relative
+            while newest is not None and group > 0 and record_time(self.records[group - 1]) == newest:
+                group -= 1
+            if newest is not None and group > 0:
+                end_time, skip = newest + timedelta(microseconds=1), relative - group
+        return CursorPosition(self.id, offset, self.query, self.start_time, end_time, self.tier, skip, time.time() + ttl)
+
+    def has_more(self, offset: int) -> bool:
+        """Return whether records remain from offset on"""
+        return not (self.exhausted and offset - self.base_offset >= len(self.records))
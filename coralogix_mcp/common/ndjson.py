@@ -0,0 +1,67 @@
+"""Incremental NDJSON parsing for streamed DataPrime responses."""
+from typing import Any, AsyncIterator, Dict
+
+from coralogix_mcp.common import jsonlib
+from coralogix_mcp.common.logger import setup_logger
+
+logger = setup_logger('coralogix_mcp')
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Decode newline-delimited JSON from an async stream of byte chunks.
+
+    Only the current, incomplete line is buffered, so memory use is bounded by the
+    largest single line rather than by the whole response body.
+
+    Args:
+        chunks: Async iterator of raw byte chunks, e.g. httpx.Response.aiter_bytes()
+
+    Yields:
+        One decoded JSON value per non-empty line
+
+    Raises:
+        jsonlib.JSONDecodeError: If a line is not valid JSON
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline == -1:
+                break
+            line = bytes(buffer[start:newline]).strip()
+            start = newline + 1
+            if line:
+                yield jsonlib.loads(line)
+        del buffer[:start]
+
+    line = bytes(buffer).strip()
+    if line:
+        yield jsonlib.loads(line)
+
+
+async def iter_dataprime_results(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict]:
+    """
+    Yield result records from every batch of a streamed DataPrime response.
+
+    A DataPrime response is a sequence of NDJSON objects: a queryId header, then any
+    number of {"result": {"results": [...]}} batches, possibly interleaved with warnings.
+
+    Args:
+        chunks: Async iterator of raw byte chunks
+
+    Yields:
+        Each record of each result batch, in the order received
+    """
+    async for message in iter_ndjson(chunks):
+        if not isinstance(message, dict):
+            continue
+        if "warning" in message:
+            logger.warning(f"DataPrime warning: {message['warning']}")
+        result = message.get("result")
+        if not isinstance(result, dict):
+            continue
+        for record in result.get("results", []):
+            yield record
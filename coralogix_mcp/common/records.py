@@ -0,0 +1,104 @@
+"""Lazily decoded DataPrime result records."""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from coralogix_mcp.common import jsonlib
+from coralogix_mcp.common.logger import setup_logger
+
+logger = setup_logger('coralogix_mcp')
+
+
+class LazyRecord(Mapping):
+    """
+    Read-only mapping over one DataPrime result record.
+
+    The payload is the JSON document in logRecord.body.log, falling back to userData. It is
+    only decoded the first time a key is read, so records that are never inspected cost
+    nothing beyond the outer NDJSON decode.
+
+    Args:
+        raw: The record as received in a DataPrime result batch
+    """
+
+    __slots__ = ("raw", "_data")
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.raw = raw
+        self._data: Optional[Dict[str, Any]] = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = self._decode()
+        return self._data
+
+    def _decode(self) -> Dict[str, Any]:
+        log_record = self.raw.get("logRecord", {})
+        if isinstance(log_record, dict):
+            body = log_record.get("body", {})
+            if isinstance(body, dict):
+                log_text = body.get("log", None)
+                if log_text:
+                    try:
+                        decoded = jsonlib.loads(log_text)
+                        if isinstance(decoded, dict):
+                            return decoded
+                    except jsonlib.JSONDecodeError:
+                        pass
+        # Fallback to userData
+        try:
+            decoded = jsonlib.loads(self.raw.get("userData", "{}"))
+        except jsonlib.JSONDecodeError:
+            logger.warning(f"Failed to parse userData JSON: {str(self.raw.get('userData'))[:100]}")
+            return {}
+        return decoded if isinstance(decoded, dict) else {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        state = "decoded" if self._data is not None else "pending"
+        return f"LazyRecord({state})"
+
+
+def dump_records(records: Iterable[Mapping]) -> List[Dict[str, Any]]:
+    """
+    Convert result records into JSON-serializable items, see load_records.
+
+    LazyRecords keep their raw, undecoded form; aggregated rows are stored as plain dicts.
+    """
+    return [{"raw": record.raw} if isinstance(record, LazyRecord) else {"data": dict(record)} for record in records]
+
+
+def load_records(items: Iterable[Dict[str, Any]]) -> List[Mapping]:
+    """Rebuild the records written by dump_records"""
+    return [LazyRecord(item["raw"]) if "raw" in item else item["data"] for item in items]
+
+
+def extract_log_text(record: Mapping) -> str:
+    """
+    Return the log message of a decoded record.
+
+    Projected records (see PROJECTED_LOG_FIELDS in the client) carry it as "log"; full
+    records carry it in logRecord.body.log, or as logRecord.body itself when that is a string.
+    """
+    projected = record.get("log")
+    if isinstance(projected, str):
+        return projected
+
+    log_record = record.get("logRecord", {})
+    if not isinstance(log_record, Mapping):
+        return ""
+    body = log_record.get("body", {})
+    if isinstance(body, str):
+        return body
+    if isinstance(body, Mapping):
+        log_text = body.get("log", "")
+        return log_text if isinstance(log_text, str) else ""
+    return ""
@@ -0,0 +1,82 @@
+"""Character n-gram index for fuzzy service name lookups."""
+import heapq
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+class ServiceNameIndex:
+    """
+    Prebuilt trigram index over a service catalog.
+
+    Lookups only touch names that share at least one trigram with the query, so exact,
+    substring and top-k fuzzy matches stay fast with hundreds of subsystems.
+
+    Args:
+        names: Service names to index. Duplicates are dropped, original order is kept.
+    """
+
+    N = 3
+
+    def __init__(self, names: Sequence[str]):
+        self.source = names
+        self.names: List[str] = list(dict.fromkeys(name for name in names if name))
+        self._lower = [name.lower() for name in self.names]
+        self._exact: Dict[str, str] = {}
+        self._grams: List[Set[str]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        # Names shorter than a trigram share no inner grams with longer targets
+        self._short = [idx for idx, lower in enumerate(self._lower) if len(lower) < self.N]
+        for idx, lower in enumerate(self._lower):
+            self._exact.setdefault(lower, self.names[idx])
+            grams = self.ngrams(lower)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings[gram].append(idx)
+
+    @classmethod
+    def ngrams(cls, text: str) -> Set[str]:
+        """Return the padded character trigrams of text"""
+        padded = f"{' ' * (cls.N - 1)}{text} "
+        return {padded[i:i + cls.N] for i in range(len(padded) - cls.N + 1)}
+
+    def exact(self, target: str) -> Optional[str]:
+        """Return the case-insensitive exact match for target, if any"""
+        return self._exact.get(target.lower())
+
+    def top_k(self, target: str, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Return up to k (name, score) pairs ranked by trigram Dice similarity to target.
+
+        Scores are in [0, 1]; ties prefer shorter names, then catalog order.
+        """
+        query = self.ngrams(target.lower())
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in query:
+            for idx in self._postings.get(gram, ()):
+                overlaps[idx] += 1
+
+        scored = (
+            (2.0 * shared / (len(query) + len(self._grams[idx])), idx)
+            for idx, shared in overlaps.items()
+        )
+        best = heapq.nsmallest(k, scored, key=lambda item: (-item[0], len(self.names[item[1]]), item[1]))
+        return [(self.names[idx], score) for score, idx in best]
+
+    def substring_matches(self, target: str) -> List[str]:
+        """Return names that contain target or are contained in it, case-insensitively, in catalog order"""
+        target = target.lower()
+        grams = self.ngrams(target)
+        candidates: Set[int] = set()
+        for gram in grams:
+            candidates.update(self._postings.get(gram, ()))
+        candidates.update(self._short)
+        if len(target) < self.N:
+            candidates = set(range(len(self.names)))
+
+        return [
+            self.names[idx] for idx in sorted(candidates)
+            if target in self._lower[idx] or self._lower[idx] in target
+        ]
+
+    def __len__(self) -> int:
+        return len(self.names)
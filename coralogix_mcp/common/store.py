@@ -0,0 +1,138 @@
+"""Persistent on-disk store for the service catalog and service name resolutions."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from coralogix_mcp.common.logger import setup_logger
+
+logger = setup_logger('coralogix_mcp')
+
+# Bump when the table layout changes; older stores are dropped and rebuilt
+SCHEMA_VERSION = 2
+
+# Expired shared query results are deleted every this many writes
+RESULT_PRUNE_INTERVAL = 100
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "coralogix-mcp", "cache.sqlite3")
+
+
+class PersistentStore:
+    """
+    Small SQLite store shared by every server process on the host.
+
+    Methods may be called from executor threads; one lock serializes them on the connection.
+
+    Args:
+        path: Database file path, created with its parent directory if missing
+        catalog_ttl: Seconds a stored service catalog stays usable
+        resolution_ttl: Seconds a stored name resolution stays usable
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, catalog_ttl: float = 24 * 3600, resolution_ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.catalog_ttl = catalog_ttl
+        self.resolution_ttl = resolution_ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._result_writes = 0
+        self._migrate()
+
+    def _migrate(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            logger.info(f"Rebuilding persistent cache {self.path} (schema {version} -> {SCHEMA_VERSION})")
+            self._conn.execute("DROP TABLE IF EXISTS catalog")
+            self._conn.execute("DROP TABLE IF EXISTS resolutions")
+            self._conn.execute("DROP TABLE IF EXISTS results")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog ("
+            "application TEXT PRIMARY KEY, names TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS resolutions ("
+            "application TEXT NOT NULL, query TEXT NOT NULL, resolved TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (application, query))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "application TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (application, key))"
+        )
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def load_catalog(self, application: str) -> Optional[Tuple[List[str], float]]:
+        """Return (service names, updated_at epoch seconds) if a fresh enough catalog is stored"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT names, updated_at FROM catalog WHERE application = ? AND updated_at > ?",
+                (application, time.time() - self.catalog_ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            return json.loads(row[0]), row[1]
+
+    def save_catalog(self, application: str, names: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalog (application, names, updated_at) VALUES (?, ?, ?)",
+                (application, json.dumps(names), time.time())
+            )
+
+    def load_resolutions(self, application: str) -> Dict[str, str]:
+        """Return the stored {requested name: resolved name} mappings that have not expired"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT query, resolved FROM resolutions WHERE application = ? AND updated_at > ?",
+                (application, time.time() - self.resolution_ttl)
+            ).fetchall()
+            return dict(rows)
+
+    def save_resolution(self, application: str, query: str, resolved: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resolutions (application, query, resolved, updated_at) VALUES (?, ?, ?, ?)",
+                (application, query, resolved, time.time())
+            )
+
+    def forget_resolutions(self, application: str, resolved_names: List[str]) -> None:
+        """Delete the stored resolutions of the application that lead to one of resolved_names"""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM resolutions WHERE application = ? AND resolved = ?",
+                [(application, name) for name in resolved_names]
+            )
+
+    def load_results(self, application: str, key: str) -> Optional[Tuple[list, float]]:
+        """Return (results, expires_at epoch seconds) of a shared query result that has not expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM results WHERE application = ? AND key = ? AND expires_at > ?",
+                (application, key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def save_results(self, application: str, key: str, results: list, ttl: float) -> None:
+        """Store a query result for other processes until ttl seconds from now"""
+        payload = json.dumps(results)
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (application, key, payload, expires_at) VALUES (?, ?, ?, ?)",
+                (application, key, payload, now + ttl)
+            )
+            self._result_writes += 1
+            if self._result_writes % RESULT_PRUNE_INTERVAL == 0:
+                self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
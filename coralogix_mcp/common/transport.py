@@ -0,0 +1,249 @@
+"""Rate limiting, retries and circuit breaking for requests to the Coralogix API."""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from coralogix_mcp.common.logger import setup_logger
+
+logger = setup_logger('coralogix_mcp')
+
+# Conservative default, set it to the account's DataPrime API quota
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_BURST = 20
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryableStatusError(Exception):
+    """The API answered with a status that is worth retrying, see RETRYABLE_STATUS_CODES"""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"API error: {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit breaker is open"""
+
+
+RETRYABLE_ERRORS = (RetryableStatusError, httpx.TransportError)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds of a Retry-After header given in seconds, or None"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every request of a process.
+
+    Args:
+        rate: Tokens added per second. A rate of 0 or less disables limiting.
+        burst: Bucket size, the number of requests that may be sent back to back
+        timer: Monotonic clock, overridable for tests
+        sleep: Async sleep, overridable for tests
+    """
+
+    def __init__(self, rate: float = DEFAULT_REQUESTS_PER_SECOND, burst: int = DEFAULT_BURST, timer: Callable[[], float] = time.monotonic, sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._timer = timer
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = timer()
+        # Created on first use so it binds to the loop that serves requests
+        self._lock: Optional[asyncio.Lock] = None
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = self._timer()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        self.acquired += 1
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.throttled += 1
+                self.wait_seconds += wait
+                await self._sleep(wait)
+                self._refill()
+            self._tokens -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 3)
+        }
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the API is degraded.
+
+    After failure_threshold consecutive failures the circuit opens and requests are
+    rejected. Once reset_timeout has passed, one probe request is let through every
+    reset_timeout: its success closes the circuit, its failure keeps it open.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds to wait before probing an open circuit
+        timer: Monotonic clock, overridable for tests
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, timer: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._timer = timer
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now"""
+        if self._state == self.CLOSED:
+            return True
+        now = self._timer()
+        if now - self._opened_at >= self.reset_timeout:
+            # Re-arm the timeout so a probe that never reports back cannot wedge the circuit
+            self._opened_at = now
+            self._state = self.HALF_OPEN
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logger.info("Coralogix API recovered, closing the circuit breaker")
+        self._state = self.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self.failure_threshold):
+            if self._state == self.CLOSED:
+                logger.warning(f"Opening the circuit breaker after {self._failures} consecutive failures")
+                self.opened += 1
+            self._state = self.OPEN
+            self._opened_at = self._timer()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+class TransportPolicy:
+    """
+    Rate limiting, jittered exponential retry and circuit breaking around API requests.
+
+    Retries cover 429/5xx answers (RetryableStatusError) and transport errors such as
+    timeouts. Any other exception is passed through untouched.
+
+    Args:
+        rate_limiter: Limiter every attempt waits on, None to disable
+        breaker: Circuit breaker shared by every request
+        tenant_limiter: Optional per-tenant limiter, waited on before a shared rate_limiter
+        max_attempts: Attempts per idempotent request, including the first one
+        base_delay: Backoff cap of the first retry in seconds, doubled per retry
+        max_delay: Upper bound of a single backoff in seconds
+        sleep: Async sleep, overridable for tests
+    """
+
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None, breaker: Optional[CircuitBreaker] = None, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0, sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep, tenant_limiter: Optional[TokenBucket] = None):
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.tenant_limiter = tenant_limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    @classmethod
+    def default(cls, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND) -> "TransportPolicy":
+        return cls(rate_limiter=TokenBucket(rate=requests_per_second))
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the delay before retry number attempt, honouring a server-provided Retry-After"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        # Full jitter keeps concurrent clients from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], idempotent: bool = True) -> Any:
+        """
+        Call fn() under the policy.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker rejected the request
+            RetryableStatusError, httpx.TransportError: If the last attempt failed
+        """
+        attempts = self.max_attempts if idempotent else 1
+        for attempt in range(1, attempts + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Coralogix API circuit breaker is open, failing fast")
+            if self.tenant_limiter is not None:
+                await self.tenant_limiter.acquire()
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+
+            self.requests += 1
+            try:
+                result = await fn()
+            except RETRYABLE_ERRORS as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                if attempt == attempts:
+                    raise
+                delay = self.backoff(attempt, getattr(e, "retry_after", None))
+                self.retries += 1
+                logger.warning(f"Coralogix request failed ({e.__class__.__name__}: {e}), retrying in {delay:.2f}s (attempt {attempt}/{attempts})")
+                await self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "circuit": self.breaker.stats(),
+            "rate_limit": self.rate_limiter.stats() if self.rate_limiter is not None else None,
+            "tenant_rate_limit": self.tenant_limiter.stats() if self.tenant_limiter is not None else None
+        }
@@ -0,0 +1,138 @@
+"""Registry of per-application Coralogix clients sharing one set of resources."""
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+import httpx
+
+from coralogix_mcp.client import HTTP_LIMITS, HTTP_TIMEOUT, QUERY_CACHE_TTLS, CoralogixClient
+from coralogix_mcp.common.cache import TenantCacheView, TTLCache
+from coralogix_mcp.common.logger import setup_logger
+from coralogix_mcp.common.transport import DEFAULT_REQUESTS_PER_SECOND, CircuitBreaker, TokenBucket, TransportPolicy
+
+logger = setup_logger('coralogix_mcp')
+
+# Bounds the number of clients kept; the least recently used ones are closed past it
+MAX_APPLICATIONS = 32
+SHARED_QUERY_CACHE_SIZE = 1024
+TENANT_QUERY_CACHE_QUOTA = 256
+
+
+class ClientRegistry:
+    """
+    One CoralogixClient per Coralogix application, created on first use.
+
+    Every client shares the registry's HTTP connection pool, rate limiter, circuit breaker
+    and query result cache. Each application gets its own share of the cache
+    (tenant_cache_quota entries) and, when tenant_requests_per_second is set, its own rate
+    limit inside the shared one, so a busy application cannot starve the others.
+
+    At most max_applications clients are kept. Past that, the least recently used client
+    other than the default one is closed, together with its on-disk store connection and
+    its entries of the shared cache, so naming many applications cannot exhaust resources
+    or lock real applications out.
+
+    Args:
+        default_application: Application used when a tool does not name one
+        client_kwargs: Keyword arguments of every CoralogixClient (model, API keys, cache_path...)
+        applications: Applications tools may use. None allows any application.
+        requests_per_second: Rate limit shared by all applications
+        tenant_requests_per_second: Rate limit of each application, None for no per-application limit
+        query_cache_size: Size of the shared query result cache
+        tenant_cache_quota: Result cache entries each application may hold
+        max_applications: Maximum number of clients kept, including the default application's
+    """
+
+    def __init__(self, default_application: str, client_kwargs: Dict, applications: Optional[Iterable[str]] = None, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND, tenant_requests_per_second: Optional[float] = None, query_cache_size: int = SHARED_QUERY_CACHE_SIZE, tenant_cache_quota: int = TENANT_QUERY_CACHE_QUOTA, max_applications: int = MAX_APPLICATIONS):
+        self.default_application = default_application
+        self.client_kwargs = client_kwargs
+        self.applications = (set(applications) | {default_application}) if applications else None
+        self.tenant_requests_per_second = tenant_requests_per_second
+        self.tenant_cache_quota = tenant_cache_quota
+        self.max_applications = max_applications
+        self.rate_limiter = TokenBucket(rate=requests_per_second)
+        self.breaker = CircuitBreaker()
+        self.query_cache = TTLCache(maxsize=query_cache_size, default_ttl=QUERY_CACHE_TTLS["default"])
+        self._http: Optional[httpx.AsyncClient] = None
+        self._clients: "OrderedDict[str, CoralogixClient]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Connection pool shared by every client, created on first use"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.client_kwargs['coralogix_api_key']}"
+                },
+                timeout=HTTP_TIMEOUT,
+                limits=HTTP_LIMITS
+            )
+        return self._http
+
+    def get(self, application_name: Optional[str] = None) -> CoralogixClient:
+        """
+        Return the client of an application, creating it on first use.
+
+        Raises:
+            ValueError: If the application is not allowed
+        """
+        application_name = application_name or self.default_application
+        client = self._clients.get(application_name)
+        if client is not None:
+            self._clients.move_to_end(application_name)
+            return client
+
+        if self.applications is not None and application_name not in self.applications:
+            raise ValueError(f"Unknown application {application_name}, expected one of {', '.join(sorted(self.applications))}")
+        if len(self._clients) >= self.max_applications:
+            self._evict_least_recently_used()
+
+        tenant_limiter = TokenBucket(rate=self.tenant_requests_per_second) if self.tenant_requests_per_second else None
+        client = CoralogixClient(
+            application_name=application_name,
+            transport=TransportPolicy(rate_limiter=self.rate_limiter, breaker=self.breaker, tenant_limiter=tenant_limiter),
+            http_client=self.http,
+            query_cache=TenantCacheView(self.query_cache, application_name, self.tenant_cache_quota),
+            **self.client_kwargs
+        )
+        self._clients[application_name] = client
+        logger.info(f"Created Coralogix client for application {application_name}")
+        return client
+
+    def _evict_least_recently_used(self):
+        name = next((name for name in self._clients if name != self.default_application), None)
+        if name is None:
+            return
+        client = self._clients.pop(name)
+        client.query_cache.clear()
+        logger.info(f"Closing the least recently used Coralogix client, for application {name}")
+        # get() is synchronous, so the client is closed in a task; aclose() awaits pending ones
+        task = asyncio.ensure_future(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @property
+    def clients(self) -> Dict[str, CoralogixClient]:
+        return dict(self._clients)
+
+    def stats(self) -> Dict:
+        """Return the shared resources' counters and each application's client stats"""
+        return {
+            "rate_limit": self.rate_limiter.stats(),
+            "circuit": self.breaker.stats(),
+            "query_cache": self.query_cache.stats(),
+            "applications": {name: client.stats() for name, client in self._clients.items()}
+        }
+
+    async def aclose(self):
+        """Close every client and the shared connection pool"""
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
@@ -1,6 +1,10 @@
 from mcp.server.fastmcp import FastMCP
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from coralogix_mcp.client import CoralogixClient
+from coralogix_mcp.common.transport import DEFAULT_REQUESTS_PER_SECOND
+from coralogix_mcp.registry import ClientRegistry
 
 logging.basicConfig(
     level=logging.INFO,
@@ -9,11 +13,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger('rds_mcp')
 
+# Upper bound on the wall-clock time of a single tool call's concurrent queries
+DEFAULT_TOOL_DEADLINE_SECONDS = 60
+
+# stdio serves a single agent session; the network transports serve many sessions from one process
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+# Hosts FastMCP guards against DNS rebinding; any other bind address must accept its own Host headers
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
 
 class CoralogixMCPServer:
-    def __init__(self, model: str, openai_api_key: str, coralogix_api_key: str, application_name: str):
-        self.mcp = FastMCP("coralogix")
-        self.client = CoralogixClient(model=model, openai_api_key=openai_api_key, coralogix_api_key=coralogix_api_key, application_name=application_name)
+    def __init__(
+        self,
+        model: str,
+        openai_api_key: str,
+        coralogix_api_key: str,
+        application_name: str,
+        tool_deadline: float = DEFAULT_TOOL_DEADLINE_SECONDS,
+        cache_path: str = None,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        shared_results: bool = False,
+        applications: list = None,
+        tenant_requests_per_second: float = None
+    ):
+        """application_name is the default application of tool calls. Tools may name another
+        one (any application, or one of applications when given); each gets its own client in
+        a ClientRegistry sharing connections, rate limits and the result cache."""
+        self.mcp = FastMCP("coralogix", lifespan=self._lifespan)
+        self.tool_deadline = tool_deadline
+        self.registry = ClientRegistry(
+            default_application=application_name,
+            client_kwargs={"model": model, "openai_api_key": openai_api_key, "coralogix_api_key": coralogix_api_key, "cache_path": cache_path, "shared_results": shared_results},
+            applications=applications,
+            requests_per_second=requests_per_second,
+            tenant_requests_per_second=tenant_requests_per_second
+        )
+        self.client = self.registry.get(application_name)
         self._register_tools()
         self.openai_api_key = openai_api_key
         self.coralogix_api_key = coralogix_api_key
@@ -24,31 +60,109 @@ class CoralogixMCPServer:
         self.mcp.tool()(self.get_2xx_logs)
         self.mcp.tool()(self.get_4xx_logs)
         self.mcp.tool()(self.get_5xx_logs)
+        self.mcp.tool()(self.get_http_overview)
+        self.mcp.tool()(self.get_http_logs_by_service)
         self.mcp.tool()(self.get_coralogix_logs_by_string)
     
-    def run_mcp_blocking(self):
+    def client_for(self, application_name: str = None) -> CoralogixClient:
+        """Return the client of the application a tool call names, defaulting to the server's application"""
+        if not application_name or application_name == self.application_name:
+            return self.client
+        return self.registry.get(application_name)
+
+    @asynccontextmanager
+    async def _lifespan(self, mcp: FastMCP):
+        """Warm the service catalog in the background and keep it fresh while the server runs"""
+        await self.client.start_background_refresh()
+        try:
+            yield {}
+        finally:
+            await self.client.stop_background_refresh()
+
+    def streamable_http_app(self):
         """
-        Runs the FastMCP server. This method is blocking and should be called
-        after any necessary asynchronous initialization (like self.client.initialize_coralogix_client)
-        has been completed in a separate AnyIO event loop.
+        Return the streamable HTTP ASGI app, with the catalog refresher tied to the app lifespan.
+
+        A stateless server runs the MCP lifespan around every request, which alone would
+        start and cancel the refresher per request. The app lifespan holds its own reference
+        for as long as the process serves, so the catalog is warmed once and kept fresh.
         """
-        # self.client.initialize_coralogix_client() is assumed to have been awaited
-        # before this synchronous method is called.
-        
-        # The FastMCP server's run method will internally call anyio.run()
-        # and manage its own event loop for stdio transport.
-        self.mcp.run(transport='stdio')
+        app = self.mcp.streamable_http_app()
+        session_lifespan = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            await self.client.start_background_refresh()
+            try:
+                async with session_lifespan(app) as state:
+                    yield state
+            finally:
+                await self.client.stop_background_refresh()
+                await self.registry.aclose()
+
+        app.router.lifespan_context = lifespan
+        return app
+
+    def run_mcp_blocking(self, transport: str = "stdio", host: str = None, port: int = None):
+        """
+        Runs the FastMCP server. This method is blocking.
+
+        The service catalog is warmed and refreshed by the server lifespan, inside the
+        same event loop that serves tool calls, so no separate initialization is needed.
+        With the sse and streamable-http transports, every agent session connected to
+        host:port shares this process's client, so HTTP connections, query results and
+        name resolutions are pooled across sessions, and the lifespan of each session
+        shares one catalog refresher. The clients and their shared connection pool are
+        closed when the server stops.
+        """
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport {transport}, expected one of {', '.join(TRANSPORTS)}")
+        if transport != "stdio":
+            self.configure_network(host, port)
+            logger.info(f"Serving MCP over {transport} on {self.mcp.settings.host}:{self.mcp.settings.port}")
+        asyncio.run(self._serve(transport))
+
+    async def _serve(self, transport: str):
+        runners = {
+            "stdio": self.mcp.run_stdio_async,
+            "sse": self.mcp.run_sse_async,
+            "streamable-http": self.mcp.run_streamable_http_async
+        }
+        try:
+            await runners[transport]()
+        finally:
+            await self.registry.aclose()
+
+    def configure_network(self, host: str = None, port: int = None):
+        """
+        Set the address of the network transports.
+
+        FastMCP enables DNS-rebinding protection, which only admits loopback Host headers,
+        when it is built for a loopback host. Listening on any other interface turns that
+        protection off, as FastMCP does itself for such hosts, so remote agents are served.
+        """
+        from mcp.server.transport_security import TransportSecuritySettings
+
+        if host:
+            self.mcp.settings.host = host
+        if port:
+            self.mcp.settings.port = port
+        if self.mcp.settings.host not in LOOPBACK_HOSTS:
+            self.mcp.settings.transport_security = TransportSecuritySettings(enable_dns_rebinding_protection=False)
 
-    async def get_2xx_logs(self, service_name = None):
-        """Analyze 2XX error logs from Coralogix with both API endpoint statistics and detailed error messages"""
+    async def get_2xx_logs(self, service_name = None, time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None, application_name: str = None):
+        """Analyze 2XX error logs from Coralogix with both API endpoint statistics and detailed error messages.
+        The window defaults to the last 15 minutes; pass time_range_minutes, or ISO-8601 start/end, to change it.
+        tier picks the Coralogix tier: "auto" (default), "frequent" or "archive".
+        application_name selects another Coralogix application than the server's default."""
         try:
-            query = await self.client.http_generate_query(service_name, query_type="2xx")
-            logs = await self.client.search_coralogix_logs(query)
+            client = self.client_for(application_name)
+            logs = await client.search_http_logs(service_name, "2xx", time_range_minutes, start, end, tier)
             
             if logs is None:
                 return {"status": "error", "message": "Error fetching logs"}
             
-            api_analysis = await self.client.analyze_logs(logs)
+            api_analysis = await client.analyze_logs(logs)
             
             return {
                 "status": "success",
@@ -59,92 +173,178 @@ class CoralogixMCPServer:
             logger.error(f"Error in get_2xx_logs: {str(e)}")
             return {"status": "error", "message": str(e)}
 
-    async def get_4xx_logs(self, service_name = None):
-        """Analyze 4XX error logs from Coralogix with both API endpoint statistics and detailed error messages"""
+    async def get_4xx_logs(self, service_name = None, time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None, application_name: str = None):
+        """Analyze 4XX error logs from Coralogix with both API endpoint statistics and detailed error messages.
+        The window defaults to the last 15 minutes; pass time_range_minutes, or ISO-8601 start/end, to change it.
+        tier picks the Coralogix tier: "auto" (default), "frequent" or "archive".
+        application_name selects another Coralogix application than the server's default."""
         try:
-            query = await self.client.http_generate_query(service_name, query_type="4xx")
-            logs = await self.client.search_coralogix_logs(query)
-            
-            # Get error details from search_recent_error_logs (always)
-            error_details = await self.client.search_recent_error_logs(service_name)
-            
-            if logs is None:
-                return {
-                    "status": "success",
-                    "api_analysis": "Error fetching 4XX error logs",
-                    "error_details": error_details,
-                    "total_errors": len(error_details) if error_details else 0
-                }
-            elif not logs:
-                return {
-                    "status": "success",
-                    "api_analysis": "No 4XX errors found in the specified time period",
-                    "error_details": error_details,
-                    "total_errors": len(error_details) if error_details else 0
-                }
-            
-            api_analysis = await self.client.analyze_logs(logs)
-            
+            return await self._get_http_error_logs(self.client_for(application_name), service_name, "4xx", time_range_minutes, start, end, tier)
+        except Exception as e:
+            logger.error(f"Error in get_4xx_logs: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    async def get_5xx_logs(self, service_name = None, time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None, application_name: str = None):
+        """Analyze 5XX error logs from Coralogix with both API endpoint statistics and detailed error messages.
+        The window defaults to the last 15 minutes; pass time_range_minutes, or ISO-8601 start/end, to change it.
+        tier picks the Coralogix tier: "auto" (default), "frequent" or "archive".
+        application_name selects another Coralogix application than the server's default."""
+        try:
+            return await self._get_http_error_logs(self.client_for(application_name), service_name, "5xx", time_range_minutes, start, end, tier)
+        except Exception as e:
+            logger.error(f"Error in get_5xx_logs: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    async def _get_http_error_logs(self, client: CoralogixClient, service_name: str, query_type: str, time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None):
+        """Run the endpoint statistics and CRITICAL details queries concurrently under one deadline"""
+        label = query_type.upper()
+        resolved_name = await client.find_matching_coralogix_service_name(service_name)
+        if not resolved_name:
+            raise ValueError(f"No matching service name found for {service_name}")
+
+        logs_task = asyncio.ensure_future(client.search_http_logs(resolved_name, query_type, time_range_minutes, start, end, tier))
+        details_task = asyncio.ensure_future(client.search_recent_error_logs(resolved_name, time_range_minutes, start, end, tier))
+        done, pending = await asyncio.wait([logs_task, details_task], timeout=self.tool_deadline)
+        for task in pending:
+            logger.warning(f"{label} query for {resolved_name} exceeded the {self.tool_deadline}s deadline")
+            task.cancel()
+
+        logs = self._task_result(logs_task)
+        error_details = self._task_result(details_task)
+        total_errors = len(error_details) if error_details else 0
+
+        if logs is None:
             return {
                 "status": "success",
-                "api_analysis": api_analysis,
+                "api_analysis": f"Error fetching {label} error logs",
                 "error_details": error_details,
-                "total_errors": len(error_details) if error_details else 0
+                "total_errors": total_errors
             }
-            
+        elif not logs:
+            return {
+                "status": "success",
+                "api_analysis": f"No {label} errors found in the specified time period",
+                "error_details": error_details,
+                "total_errors": total_errors
+            }
+
+        api_analysis = await client.analyze_logs(logs)
+
+        return {
+            "status": "success",
+            "api_analysis": api_analysis,
+            "error_details": error_details,
+            "total_errors": total_errors
+        }
+
+    @staticmethod
+    def _task_result(task: asyncio.Future):
+        """Return a finished task's result, or None if it was cancelled or failed"""
+        if not task.done() or task.cancelled():
+            return None
+        if task.exception() is not None:
+            logger.error(f"Concurrent query failed: {task.exception()}")
+            return None
+        return task.result()
+
+    async def get_http_overview(self, service_name = None, time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None, application_name: str = None):
+        """Analyze 2XX, 4XX and 5XX logs from Coralogix together, with API endpoint statistics per status class.
+        Uses a single query for all classes; later get_2xx_logs/get_4xx_logs/get_5xx_logs calls for the same
+        service and window are answered from it. The window defaults to the last 15 minutes.
+        tier picks the Coralogix tier: "auto" (default), "frequent" or "archive".
+        application_name selects another Coralogix application than the server's default."""
+        try:
+            client = self.client_for(application_name)
+            by_class = await client.search_http_overview(service_name, time_range_minutes, start, end, tier)
+            if by_class is None:
+                return {"status": "error", "message": "Error fetching logs"}
+
+            analysis = {}
+            for name, logs in by_class.items():
+                analysis[name] = await client.analyze_logs(logs) if logs else f"No {name.upper()} requests found in the specified time period"
+
+            return {
+                "status": "success",
+                "api_analysis": analysis
+            }
+
         except Exception as e:
-            logger.error(f"Error in get_4xx_logs: {str(e)}")
+            logger.error(f"Error in get_http_overview: {str(e)}")
             return {"status": "error", "message": str(e)}
 
-    async def get_5xx_logs(self, service_name = None):
-        """Analyze 5XX error logs from Coralogix with both API endpoint statistics and detailed error messages"""
+    async def get_http_logs_by_service(self, service_names: list = None, query_type: str = "5xx", time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None, application_name: str = None):
+        """Summarize 2XX, 4XX or 5XX logs of several services in one call, e.g. to find which services are throwing 5XX errors right now.
+        service_names is a list of service names, or "all" (default) for every service; with "all" only services with matching logs are listed.
+        query_type is "2xx", "4xx", "5xx" (default) or "all". Services are ordered by request count.
+        The window defaults to the last 15 minutes; pass time_range_minutes, or ISO-8601 start/end, to change it.
+        tier picks the Coralogix tier: "auto" (default), "frequent" or "archive".
+        application_name selects another Coralogix application than the server's default."""
         try:
-            query = await self.client.http_generate_query(service_name, query_type="5xx")
-            logs = await self.client.search_coralogix_logs(query)
-            
-            # Get error details from search_recent_error_logs (always)
-            error_details = await self.client.search_recent_error_logs(service_name)
-            
-            if logs is None:
-                return {
-                    "status": "success",
-                    "api_analysis": "Error fetching 5XX error logs",
-                    "error_details": error_details,
-                    "total_errors": len(error_details) if error_details else 0
-                }
-            elif not logs:
-                return {
-                    "status": "success",
-                    "api_analysis": "No 5XX errors found in the specified time period",
-                    "error_details": error_details,
-                    "total_errors": len(error_details) if error_details else 0
-                }
-            
-            api_analysis = await self.client.analyze_logs(logs)
-            
+            if query_type not in ("2xx", "4xx", "5xx", "all"):
+                return {"status": "error", "message": f"Unknown query_type {query_type}, expected 2xx, 4xx, 5xx or all"}
+            client = self.client_for(application_name)
+            all_services = not service_names or (isinstance(service_names, str) and service_names.strip().lower() == "all")
+            resolved, unresolved = await client.resolve_service_names("all" if all_services else service_names)
+            subsystems = list(dict.fromkeys(resolved.values()))
+            if not subsystems and not all_services:
+                return {"status": "error", "message": f"No matching service names found for {', '.join(unresolved)}"}
+
+            try:
+                by_service = await asyncio.wait_for(
+                    client.search_http_logs_by_service(subsystems, query_type, time_range_minutes, start, end, tier, all_services=all_services),
+                    timeout=self.tool_deadline
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"{query_type.upper()} batch query exceeded the {self.tool_deadline}s deadline")
+                by_service = None
+            if by_service is None:
+                return {"status": "error", "message": "Error fetching logs"}
+
+            label = query_type.upper()
+            summaries = {}
+            for name, logs in by_service.items():
+                if logs is None:
+                    summaries[name] = {"status": "error", "message": "Error fetching logs"}
+                elif logs:
+                    summaries[name] = await client.analyze_logs(logs)
+                elif not all_services:
+                    summaries[name] = {"total_requests": 0, "summary": f"No {label} requests found in the specified time period"}
+            ranked = sorted(summaries.items(), key=lambda item: item[1].get("total_requests", 0), reverse=True)
+
             return {
                 "status": "success",
-                "api_analysis": api_analysis,
-                "error_details": error_details,
-                "total_errors": len(error_details) if error_details else 0
+                "query_type": query_type,
+                "total_requests": sum(summary.get("total_requests", 0) for _, summary in ranked),
+                "services": dict(ranked),
+                "unresolved_services": unresolved
             }
-            
+
         except Exception as e:
-            logger.error(f"Error in get_5xx_logs: {str(e)}")
+            logger.error(f"Error in get_http_logs_by_service: {str(e)}")
             return {"status": "error", "message": str(e)}
 
-    async def get_coralogix_logs_by_string(self, search_string: str, service_name: str = None, context_lines: int = 100):
-        """Search logs for a specific string and return context around matches by service name if provided"""
+    async def get_coralogix_logs_by_string(self, search_string: str, service_name: str = None, context_lines: int = 100, time_range_minutes: int = None, start: str = None, end: str = None, tier: str = None, page_size: int = None, cursor: str = None, application_name: str = None):
+        """Search logs for a specific string and return context around matches by service name if provided.
+        The window defaults to the last 15 minutes; pass time_range_minutes, or ISO-8601 start/end, to change it.
+        tier picks the Coralogix tier: "auto" (default), "frequent" or "archive".
+        application_name selects another Coralogix application than the server's default.
+        Without page_size or cursor, the 100 most relevant matches are returned. Pass page_size to page through
+        all matches newest first: the response carries a next_cursor, pass it back as cursor to get the next page.
+        Cursors expire after 10 minutes without use."""
         try:
-            query = await self.client.search_generate_query(search_string, service_name)
-            logs = await self.client.search_coralogix_logs(query)
+            client = self.client_for(application_name)
+            if page_size or cursor:
+                return await self._get_logs_page(client, search_string, service_name, context_lines, time_range_minutes, start, end, tier, page_size, cursor)
+
+            query = await client.search_generate_query(search_string, service_name)
+            logs = await client.search_coralogix_logs(query, time_range_minutes, start, end, tier, query_type="search")
             
             if logs is None:
                 return {"status": "error", "message": "Error fetching logs"}
             elif not logs:
                 return {"status": "success", "message": f"No logs found containing '{search_string}'", "results": []}
             
-            context_results = await self.client.get_log_context(logs, search_string, context_lines)
+            context_results = await client.get_log_context(logs, search_string, context_lines)
             
             return {
                 "status": "success",
@@ -155,4 +355,22 @@ class CoralogixMCPServer:
             
         except Exception as e:
             logger.error(f"Error searching logs: {str(e)}")
-            return {"status": "error", "message": str(e)}
\ No newline at end of file
+            return {"status": "error", "message": str(e)}
+
+    async def _get_logs_page(self, client: CoralogixClient, search_string: str, service_name: str, context_lines: int, time_range_minutes: int, start: str, end: str, tier: str, page_size: int, cursor: str):
+        """Return one page of a cursor-based search with context around each match"""
+        page = await client.search_logs_page(search_string, service_name, cursor, page_size, time_range_minutes, start, end, tier)
+        if page is None:
+            return {"status": "error", "message": "Error fetching logs"}
+
+        context_results = await client.get_log_context(page["results"], search_string, context_lines)
+        return {
+            "status": "success",
+            "search_string": search_string,
+            "offset": page["offset"],
+            "page_logs": len(page["results"]),
+            "total_matches": len(context_results),
+            "results": context_results,
+            "next_cursor": page["next_cursor"],
+            "truncated": page["truncated"]
+        }
@@ -0,0 +1,136 @@
+"""Pre-fork worker mode for the network transports."""
+import logging
+import os
+import signal
+import socket
+import time
+from typing import TYPE_CHECKING, Callable, Dict
+
+if TYPE_CHECKING:
+    from coralogix_mcp.server import CoralogixMCPServer
+
+logger = logging.getLogger('rds_mcp')
+
+# A worker exiting sooner than this after its start counts as a failed start
+WORKER_MIN_UPTIME_SECONDS = 10.0
+# Failed starts in a row of one worker slot after which the whole server gives up
+MAX_FAST_WORKER_FAILURES = 5
+# Delay before restarting a worker after a failed start, doubled per failure
+WORKER_RESTART_BASE_DELAY = 0.5
+WORKER_RESTART_MAX_DELAY = 30.0
+
+
+def run_workers(server_factory: Callable[[], "CoralogixMCPServer"], transport: str, host: str, port: int, workers: int) -> int:
+    """
+    Serve a network transport from several worker processes sharing one listening socket.
+
+    The socket is bound once in the parent, then each worker is forked and builds its own
+    server with server_factory, so no event loop, HTTP pool or SQLite connection crosses
+    a fork. The kernel spreads incoming connections over the workers, so requests of one
+    agent session may reach different workers: streamable HTTP is served statelessly, and
+    SSE, whose event stream is tied to one process, is not supported. Workers that exit
+    unexpectedly are restarted, with a growing delay when they die right after starting;
+    after MAX_FAST_WORKER_FAILURES such failures in a row the server stops. SIGINT or
+    SIGTERM stops all workers.
+
+    Args:
+        server_factory: Builds the CoralogixMCPServer of one worker
+        transport: Must be "streamable-http"
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Number of worker processes
+
+    Returns:
+        The process exit code, 1 if workers kept failing to start
+    """
+    import uvicorn
+
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-worker mode needs os.fork and is not available on this platform")
+    if transport != "streamable-http":
+        raise ValueError(f"Multi-worker mode needs the streamable-http transport, got {transport}")
+
+    sock = uvicorn.Config(app=None, host=host, port=port).bind_socket()
+    children: Dict[int, int] = {}
+    started_at: Dict[int, float] = {}
+    fast_failures = [0] * workers
+    stopping = False
+    exit_code = 0
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 1
+            try:
+                _serve_worker(server_factory, transport, sock, host, port)
+                code = 0
+            except Exception as e:
+                logger.error(f"Worker {slot} failed: {e}")
+            finally:
+                os._exit(code)
+        children[pid] = slot
+        started_at[pid] = time.monotonic()
+
+    def stop(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    previous_handlers = {signum: signal.signal(signum, stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+
+    logger.info(f"Serving MCP over {transport} on {host}:{port} with {workers} workers")
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        uptime = time.monotonic() - started_at.pop(pid, 0.0)
+        if slot is None or stopping:
+            continue
+        if uptime >= WORKER_MIN_UPTIME_SECONDS:
+            fast_failures[slot] = 0
+            logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}, restarting it")
+            spawn(slot)
+            continue
+
+        fast_failures[slot] += 1
+        if fast_failures[slot] >= MAX_FAST_WORKER_FAILURES:
+            logger.error(f"Worker {slot} failed {fast_failures[slot]} times in a row right after starting, stopping the server")
+            exit_code = 1
+            stop()
+            continue
+        delay = min(WORKER_RESTART_MAX_DELAY, WORKER_RESTART_BASE_DELAY * 2 ** (fast_failures[slot] - 1))
+        logger.warning(f"Worker {slot} (pid {pid}) exited with status {status} after {uptime:.1f}s, restarting it in {delay:.1f}s")
+        time.sleep(delay)
+        if not stopping:
+            spawn(slot)
+
+    for signum, handler in previous_handlers.items():
+        signal.signal(signum, handler)
+    sock.close()
+    return exit_code
+
+
+def _serve_worker(server_factory: Callable[[], "CoralogixMCPServer"], transport: str, sock: socket.socket, host: str, port: int):
+    """Build this worker's server and serve requests from the inherited socket until stopped"""
+    import uvicorn
+
+    server = server_factory()
+    server.configure_network(host, port)
+    # No session state lives in a worker, any worker can answer any request
+    server.mcp.settings.stateless_http = True
+    app = server.streamable_http_app()
+    config = uvicorn.Config(app, log_level=server.mcp.settings.log_level.lower())
+    uvicorn.Server(config).run(sockets=[sock])
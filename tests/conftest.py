@@ -1,8 +1,25 @@
-import os
+import json
+import httpx
 import pytest
-from unittest.mock import Mock, patch
 from coralogix_mcp.client import CoralogixClient
 
+
+class MockDataPrimeAPI:
+    """In-process stand-in for the Coralogix DataPrime endpoint"""
+
+    def __init__(self):
+        self.status_code = 200
+        self.text = ""
+        self.calls = []
+
+    def respond(self, text: str, status_code: int = 200):
+        self.text = text
+        self.status_code = status_code
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(json.loads(request.content))
+        return httpx.Response(self.status_code, text=self.text)
+
 @pytest.fixture
 def mock_env_vars(monkeypatch):
     """Set up mock environment variables for testing"""
@@ -14,16 +31,16 @@ def mock_env_vars(monkeypatch):
 @pytest.fixture
 def mock_coralogix_client(mock_env_vars):
     """Create a CoralogixClient instance with mocked dependencies"""
-    with patch('coralogix_mcp.client.requests') as mock_requests:
-        client = CoralogixClient(
-            model="gpt-3.5-turbo",
-            openai_api_key="test_openai_key",
-            coralogix_api_key="test_coralogix_key",
-            application_name="test-app"
-        )
-        client.llm = Mock()
-        client._requests = mock_requests  # Assign the mocked requests module
-        yield client
+    api = MockDataPrimeAPI()
+    client = CoralogixClient(
+        model="gpt-3.5-turbo",
+        openai_api_key="test_openai_key",
+        coralogix_api_key="test_coralogix_key",
+        application_name="test-app"
+    )
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(api.handler), headers=client.headers)
+    client._api = api  # Assign the mocked DataPrime endpoint
+    yield client
 
 @pytest.fixture
 def sample_log_results():
@@ -0,0 +1,56 @@
+import pytest
+
+from coralogix_mcp.common.aggregate import EndpointAggregator
+
+
+def test_endpoint_aggregator_top_k():
+    """Test counts are summed per endpoint and the top k are returned busiest first"""
+    aggregator = EndpointAggregator()
+    aggregator.add_rows([
+        {"new_path": "/a", "http_method": "GET", "status_code": 500, "log_count": 3},
+        {"new_path": "/b", "http_method": "GET", "status_code": 500, "log_count": 5},
+        {"new_path": "/a", "http_method": "GET", "status_code": 500, "log_count": 4},
+        {"new_path": "unknown", "http_method": "GET", "status_code": 500, "log_count": 9},
+        {"new_path": "/c", "http_method": "POST", "status_code": "503", "log_count": 1},
+    ])
+
+    assert aggregator.total_requests == 13
+    assert [(row["new_path"], row["log_count"]) for row in aggregator.top(2)] == [("/a", 7), ("/b", 5)]
+    assert len(aggregator) == 3
+
+
+def test_endpoint_aggregator_bounded_keeps_heavy_hitters():
+    """Test a full aggregator stays within max_endpoints and never loses a heavy endpoint"""
+    aggregator = EndpointAggregator(max_endpoints=3)
+    for i in range(50):
+        aggregator.add("/hot", "GET", 500, 10)
+        aggregator.add(f"/cold-{i}", "GET", 500, 1)
+    aggregator.add("/warm", "GET", 500, 40)
+
+    assert len(aggregator) == 3
+    top = aggregator.top(2)
+    assert [row["new_path"] for row in top] == ["/hot", "/warm"]
+    assert top[0]["log_count"] == 500
+    assert "max_overcount" not in top[0]
+    assert top[1]["max_overcount"] == top[1]["log_count"] - 40
+    assert aggregator.total_requests == 590
+
+
+def test_endpoint_aggregator_custom_fields_rows():
+    """Test groups can carry extra fields, such as the subsystem, and rows() returns every group"""
+    aggregator = EndpointAggregator(fields=("subsystemname", "new_path"))
+    aggregator.add_rows([
+        {"subsystemname": "a", "new_path": "unknown", "log_count": 1},
+        {"subsystemname": "a", "new_path": "unknown", "log_count": 2},
+        {"subsystemname": "b", "new_path": "unknown", "log_count": 4},
+    ], skip_unknown_paths=False)
+
+    assert sorted(aggregator.rows(), key=lambda row: row["subsystemname"]) == [
+        {"subsystemname": "a", "new_path": "unknown", "log_count": 3},
+        {"subsystemname": "b", "new_path": "unknown", "log_count": 4},
+    ]
+
+
+def test_endpoint_aggregator_rejects_empty_capacity():
+    with pytest.raises(ValueError):
+        EndpointAggregator(max_endpoints=0)
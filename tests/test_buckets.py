@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+from coralogix_mcp.common.buckets import MinuteBuckets, parse_bucket_minute
+
+T0 = datetime(2024, 3, 20, 10, 0, tzinfo=timezone.utc)
+
+
+def minute(offset):
+    return T0 + timedelta(minutes=offset)
+
+
+def row(offset, path="/a", status=200, count=1):
+    return {"minute": minute(offset).isoformat(), "new_path": path, "http_method": "GET", "status_code": status, "log_count": count}
+
+
+def test_parse_bucket_minute_formats():
+    """Test ISO strings and epoch seconds, milliseconds and nanoseconds all floor to the minute"""
+    epoch = (T0 + timedelta(seconds=42)).timestamp()
+    assert parse_bucket_minute("2024-03-20T10:00:42Z") == T0
+    assert parse_bucket_minute(epoch) == T0
+    assert parse_bucket_minute(int(epoch * 1000)) == T0
+    assert parse_bucket_minute(str(int(epoch * 1e9))) == T0
+    assert parse_bucket_minute("not a time") is None
+
+
+def test_minute_buckets_fetch_only_unsealed_minutes():
+    """Test sealed minutes are kept and only the open tail is refetched and replaced"""
+    buckets = MinuteBuckets(capacity_minutes=60)
+    assert buckets.missing_range(minute(0), minute(15)) == (minute(0), minute(15))
+
+    buckets.update(minute(0), minute(15), [row(0, count=2), row(14, count=5), row(14, status=500)], sealed_until=minute(13))
+    assert buckets.missing_range(minute(0), minute(15)) == (minute(13), minute(15))
+    assert buckets.missing_range(minute(0), minute(10)) is None
+
+    # The refetch replaces minute 14 instead of adding to it
+    buckets.update(minute(13), minute(16), [row(14, count=6), row(15)], sealed_until=minute(14))
+    rollup = {(r["new_path"], r["status_code"]): r["log_count"] for r in buckets.rollup(minute(1), minute(16))}
+    assert rollup == {("/a", 200): 7}
+    assert buckets.missing_range(minute(1), minute(16)) == (minute(14), minute(16))
+
+
+def test_minute_buckets_evicts_old_minutes():
+    """Test minutes older than the capacity are dropped and windows reaching back are refetched"""
+    buckets = MinuteBuckets(capacity_minutes=10)
+    buckets.update(minute(0), minute(10), [row(0), row(9)], sealed_until=minute(8))
+    buckets.update(minute(8), minute(15), [row(9), row(14)], sealed_until=minute(13))
+
+    # Minute 0 fell out of the ring, minutes 9 and 14 remain
+    assert [r["log_count"] for r in buckets.rollup(minute(0), minute(15))] == [2]
+    assert buckets.missing_range(minute(0), minute(15)) == (minute(0), minute(15))
+    assert buckets.missing_range(minute(5), minute(15)) == (minute(13), minute(15))
@@ -0,0 +1,61 @@
+from coralogix_mcp.common.cache import TenantCacheView, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    """Test entries are served until their TTL elapses"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, default_ttl=10, timer=clock)
+    cache.set("a", [1])
+    cache.set("b", [2], ttl=30)
+
+    clock.now = 5
+    assert cache.get("a") == [1]
+
+    clock.now = 15
+    assert cache.get("a") is None
+    assert cache.get("b") == [2]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test the cache stays bounded and evicts the least recently used entry"""
+    cache = TTLCache(maxsize=2, default_ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_tenant_cache_view_enforces_quota():
+    """Test each tenant is limited to its quota of a shared cache and cannot read other tenants' keys"""
+
+    shared = TTLCache(maxsize=10, default_ttl=60)
+    busy = TenantCacheView(shared, "busy", quota=2)
+    quiet = TenantCacheView(shared, "quiet", quota=2)
+    quiet.set("q", [0])
+    for key in ("a", "b", "c"):
+        busy.set(key, [key])
+
+    assert busy.get("a") is None
+    assert busy.get("c") == ["c"]
+    assert quiet.get("q") == [0]
+    assert quiet.get("c") is None
+    assert len(busy) == 2
+    assert busy.stats()["evictions"] == 1
+    assert busy.stats()["shared_size"] == 3
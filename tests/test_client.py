@@ -1,19 +1,22 @@
+import asyncio
 import json
+import httpx
 import pytest
 from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from datetime import datetime, timezone, timedelta
+import coralogix_mcp.client as client_module
+from coralogix_mcp.client import LLM_HARD_TIMEOUT_FACTOR, MAX_CONCURRENT_NAME_RESOLUTIONS, NO_MATCH, CoralogixClient, merge_by_timestamp, parse_timestamp, query_limit
+from coralogix_mcp.common.aggregate import EndpointAggregator
+from coralogix_mcp.common.transport import TransportPolicy
 
 @pytest.mark.asyncio
 async def test_fetch_service_names(mock_coralogix_client, sample_log_results):
     """Test fetching service names from Coralogix"""
     # Mock the response
-    mock_response = Mock()
-    mock_response.ok = True
-    mock_response.text = "\n".join([
+    mock_coralogix_client._api.respond("\n".join([
         '{"status": "ok"}',
         json.dumps({"result": {"results": sample_log_results}})
-    ])
-    mock_coralogix_client._requests.post.return_value = mock_response
+    ]))
 
     # Test fetching service names
     service_names = await mock_coralogix_client.fetch_service_names()
@@ -29,13 +32,10 @@ async def test_fetch_service_names(mock_coralogix_client, sample_log_results):
 @pytest.mark.asyncio
 async def test_fetch_service_names_empty_response(mock_coralogix_client):
     """Test fetching service names with empty response"""
-    mock_response = Mock()
-    mock_response.ok = True
-    mock_response.text = "\n".join([
+    mock_coralogix_client._api.respond("\n".join([
         '{"status": "ok"}',
         json.dumps({"result": {"results": []}})
-    ])
-    mock_coralogix_client._requests.post.return_value = mock_response
+    ]))
 
     service_names = await mock_coralogix_client.fetch_service_names()
     assert service_names == []
@@ -76,14 +76,12 @@ async def test_http_generate_query(mock_coralogix_client):
     
     query = await mock_coralogix_client.http_generate_query("test-service", "4xx")
     assert "filter $l.subsystemname == 'test-service'" in query
-    assert "filter ($d.status_code >= '400' && $d.status_code <= '499')" in query
+    assert "filter ($d.status_code:num >= 400 && $d.status_code:num <= 499)" in query
 
 @pytest.mark.asyncio
 async def test_search_coralogix_logs(mock_coralogix_client, sample_http_logs):
     """Test searching Coralogix logs"""
-    mock_response = Mock()
-    mock_response.ok = True
-    mock_response.text = "\n".join([
+    mock_coralogix_client._api.respond("\n".join([
         '{"status": "ok"}',
         json.dumps({
             "result": {
@@ -105,8 +103,7 @@ async def test_search_coralogix_logs(mock_coralogix_client, sample_http_logs):
                 ]
             }
         })
-    ])
-    mock_coralogix_client._requests.post.return_value = mock_response
+    ]))
     
     results = await mock_coralogix_client.search_coralogix_logs("test query")
     assert len(results) == 2
@@ -123,6 +120,19 @@ async def test_analyze_logs(mock_coralogix_client, sample_http_logs):
     assert analysis["top_apis"][0]["new_path"] == "/api/v1/users"
     assert analysis["top_apis"][0]["log_count"] == 100
 
+@pytest.mark.asyncio
+async def test_analyze_logs_sums_duplicate_endpoints(mock_coralogix_client, sample_http_logs):
+    """Test rows for the same endpoint from separate batches add up instead of overwriting each other"""
+
+    analysis = await mock_coralogix_client.analyze_logs(sample_http_logs + [dict(sample_http_logs[1], log_count=70)], top_k=1)
+    assert analysis["total_requests"] == 220
+    assert analysis["top_apis"] == [{"http_method": "POST", "log_count": 120, "new_path": "/api/v1/orders", "status_code": "400"}]
+
+    merged = EndpointAggregator().add_rows(sample_http_logs[:1]).merge(EndpointAggregator().add_rows(sample_http_logs))
+    analysis = await mock_coralogix_client.analyze_logs(merged)
+    assert analysis["total_requests"] == 250
+    assert analysis["top_apis"][0]["log_count"] == 200
+
 @pytest.mark.asyncio
 async def test_get_log_context(mock_coralogix_client):
     """Test getting log context"""
@@ -173,9 +183,7 @@ async def test_search_recent_error_logs(mock_coralogix_client, sample_error_logs
             }
         }
     }
-    mock_response = Mock()
-    mock_response.ok = True
-    mock_response.text = "\n".join([
+    mock_coralogix_client._api.respond("\n".join([
         '{"status": "ok"}',
         json.dumps({
             "result": {
@@ -197,8 +205,7 @@ async def test_search_recent_error_logs(mock_coralogix_client, sample_error_logs
                 ]
             }
         })
-    ])
-    mock_coralogix_client._requests.post.return_value = mock_response
+    ]))
     # Mock the query generation
     mock_coralogix_client.search_generate_query = AsyncMock(return_value="test query")
     results = await mock_coralogix_client.search_recent_error_logs("test-service-1")
@@ -225,11 +232,7 @@ def test_find_best_match_basic(mock_coralogix_client):
 @pytest.mark.asyncio
 async def test_fetch_service_names_404(mock_coralogix_client):
     """Test fetch_service_names when the API returns a 404 error."""
-    mock_response = Mock()
-    mock_response.ok = False
-    mock_response.status_code = 404
-    mock_response.text = "Not found"
-    mock_coralogix_client._requests.post.return_value = mock_response
+    mock_coralogix_client._api.respond("Not found", status_code=404)
     service_names = await mock_coralogix_client.fetch_service_names()
     assert service_names == []
 
@@ -243,4 +246,575 @@ async def test_call_llm(mock_coralogix_client):
     with patch('coralogix_mcp.client.acompletion', return_value=mock_response):
         prompt = "Find the best matching service name for 'test' from [test-service-1, test-service-2]"
         result = await mock_coralogix_client.call_llm(prompt)
-        assert result == '{"service_name":"test-service-1"}' 
\ No newline at end of file
+        assert result == '{"service_name":"test-service-1"}' 
+
+@pytest.mark.asyncio
+async def test_call_llm_hard_timeout(mock_coralogix_client):
+    """Test a hung LLM provider is abandoned after the hard timeout instead of running forever"""
+
+    async def hung_completion(**kwargs):
+        hung_completion.timeout = kwargs["timeout"]
+        await asyncio.sleep(3600)
+
+    mock_coralogix_client.llm_timeout = 0.01
+    with patch('coralogix_mcp.client.acompletion', hung_completion):
+        assert await mock_coralogix_client.call_llm("prompt") is None
+    assert hung_completion.timeout == 0.01 * LLM_HARD_TIMEOUT_FACTOR
+
+@pytest.mark.asyncio
+async def test_search_coralogix_logs_concurrent_requests_overlap(mock_coralogix_client):
+    """Test concurrent searches share the pooled async client without blocking each other"""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(200, text='{"status": "ok"}\n' + json.dumps({"result": {"results": []}}))
+
+    mock_coralogix_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results = await asyncio.gather(*[
+        mock_coralogix_client.search_coralogix_logs(f"query {i}") for i in range(3)
+    ])
+    assert results == [[], [], []]
+    assert max_in_flight == 3
+
+def test_query_window_rolls_and_aligns(mock_coralogix_client):
+    """Test the query window is computed per call and aligned to whole minutes"""
+    fixed_now = datetime(2024, 3, 20, 10, 7, 31, 123456, tzinfo=timezone.utc)
+    with patch('coralogix_mcp.client.datetime') as mock_datetime:
+        mock_datetime.now.return_value = fixed_now
+        start, end = mock_coralogix_client.query_window()
+    assert end == datetime(2024, 3, 20, 10, 8, tzinfo=timezone.utc)
+    assert start == end - timedelta(minutes=15)
+
+    start, end = mock_coralogix_client.query_window(start="2024-03-20T09:00:45Z", end="2024-03-20T09:30:00Z")
+    assert start == datetime(2024, 3, 20, 9, 0, tzinfo=timezone.utc)
+    assert end == datetime(2024, 3, 20, 9, 30, tzinfo=timezone.utc)
+
+    with pytest.raises(ValueError):
+        mock_coralogix_client.query_window(start="2024-03-20T10:00:00Z", end="2024-03-20T09:00:00Z")
+
+@pytest.mark.asyncio
+async def test_search_coralogix_logs_uses_call_time_window(mock_coralogix_client):
+    """Test each search sends the window it was asked for rather than one frozen at construction"""
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({"result": {"results": []}}))
+    await mock_coralogix_client.search_coralogix_logs("q", time_range_minutes=60, end="2024-03-20T10:00:00Z")
+    metadata = mock_coralogix_client._api.calls[-1]["metadata"]
+    assert metadata["startTime"] == "2024-03-20T09:00:00.000000Z"
+    assert metadata["endTime"] == "2024-03-20T10:00:00.000000Z"
+
+@pytest.mark.asyncio
+async def test_search_coralogix_logs_cached(mock_coralogix_client, sample_http_logs):
+    """Test repeated identical searches are answered from the result cache"""
+    mock_coralogix_client._api.respond("\n".join([
+        '{"status": "ok"}',
+        json.dumps({"result": {"results": [{"logRecord": {"body": {"log": json.dumps(sample_http_logs[0])}}}]}})
+    ]))
+
+    first = await mock_coralogix_client.search_coralogix_logs("test query", end="2024-03-20T10:00:00Z", query_type="http")
+    second = await mock_coralogix_client.search_coralogix_logs("test query", end="2024-03-20T10:00:00Z", query_type="http")
+
+    assert first == second
+    assert len(mock_coralogix_client._api.calls) == 1
+    assert mock_coralogix_client.query_cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_coalesced(mock_coralogix_client, sample_log_results):
+    """Test concurrent identical searches and catalog fetches send a single HTTP request each"""
+
+    calls = []
+
+    async def handler(request):
+        calls.append(json.loads(request.content)["query"])
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, text='{"status": "ok"}\n' + json.dumps({"result": {"results": sample_log_results}}))
+
+    mock_coralogix_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    searches = await asyncio.gather(*[
+        mock_coralogix_client.search_coralogix_logs("same query", end="2024-03-20T10:00:00Z") for _ in range(5)
+    ])
+    names = await asyncio.gather(*[mock_coralogix_client.fetch_service_names() for _ in range(5)])
+
+    assert len(calls) == 2
+    assert all(result == searches[0] for result in searches)
+    assert all(result == ["test-service-1", "test-service-2"] for result in names)
+
+@pytest.mark.asyncio
+async def test_find_matching_coralogix_service_name_llm_timeout(mock_coralogix_client):
+    """Test a slow LLM falls back to basic matching and its late answer is still cached"""
+
+    async def slow_llm(prompt):
+        await asyncio.sleep(0.1)
+        return '{"service_name": "test-service-2"}'
+
+    mock_coralogix_client.llm_timeout = 0.01
+    mock_coralogix_client.fetch_service_names = AsyncMock(return_value=["test-service-1", "test-service-2"])
+    mock_coralogix_client.call_llm = slow_llm
+
+    result = await mock_coralogix_client.find_matching_coralogix_service_name("test")
+    assert result == "test-service-1"
+
+    await asyncio.gather(*mock_coralogix_client._background_tasks)
+    assert mock_coralogix_client._service_name_matching_cache.get("test") == "test-service-2"
+
+@pytest.mark.asyncio
+async def test_find_matching_coralogix_service_name_confident_index_match(mock_coralogix_client):
+    """Test a confident fuzzy match resolves without calling the LLM"""
+    mock_coralogix_client.fetch_service_names = AsyncMock(return_value=["payments-api", "user-service", "orders-api"])
+    mock_coralogix_client.call_llm = AsyncMock()
+
+    result = await mock_coralogix_client.find_matching_coralogix_service_name("payment-api")
+    assert result == "payments-api"
+    mock_coralogix_client.call_llm.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_find_matching_coralogix_service_name_llm_shortlist(mock_coralogix_client):
+    """Test ambiguous names send only the top-k shortlist to the LLM"""
+    catalog = [f"service-{i}" for i in range(50)] + ["payments-api", "payments-worker"]
+    mock_coralogix_client.fetch_service_names = AsyncMock(return_value=catalog)
+    mock_coralogix_client.call_llm = AsyncMock(return_value='{"service_name": "payments-worker"}')
+
+    result = await mock_coralogix_client.find_matching_coralogix_service_name("payments")
+    assert result == "payments-worker"
+    prompt = mock_coralogix_client.call_llm.call_args[0][0]
+    assert "payments-api" in prompt
+    assert "service-42" not in prompt
+
+@pytest.mark.asyncio
+async def test_persistent_cache_warm_start(tmp_path, sample_log_results):
+    """Test a new client answers name resolution from disk and refreshes the catalog in the background"""
+
+    path = str(tmp_path / "cache.sqlite3")
+    api_calls = []
+
+    def handler(request):
+        api_calls.append(request)
+        return httpx.Response(200, text='{"status": "ok"}\n' + json.dumps({"result": {"results": sample_log_results}}))
+
+    first = CoralogixClient(model="m", openai_api_key="k", coralogix_api_key="k", application_name="test-app", cache_path=path)
+    first._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    first.call_llm = AsyncMock(return_value='{"service_name": "test-service-2"}')
+    assert await first.find_matching_coralogix_service_name("service two") == "test-service-2"
+    assert len(api_calls) == 1
+
+    second = CoralogixClient(model="m", openai_api_key="k", coralogix_api_key="k", application_name="test-app", cache_path=path)
+    second._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    second.call_llm = AsyncMock()
+    assert await second.find_matching_coralogix_service_name("service two") == "test-service-2"
+    second.call_llm.assert_not_called()
+
+    # An expired catalog from disk is served immediately while a refresh runs
+    second._service_name_cache["timestamp"] -= timedelta(hours=1)
+    assert await second.fetch_service_names() == ["test-service-1", "test-service-2"]
+    await asyncio.gather(*second._background_tasks)
+    assert len(api_calls) == 2
+    assert second._service_name_cache["source"] == "api"
+
+@pytest.mark.asyncio
+async def test_fetch_service_names_stale_while_revalidate(mock_coralogix_client, sample_log_results):
+    """Test an expired catalog is served immediately while a refresh runs in the background"""
+
+    mock_coralogix_client._service_name_cache["data"] = ["old-service"]
+    mock_coralogix_client._service_name_cache["timestamp"] = datetime.now(timezone.utc) - timedelta(hours=1)
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({"result": {"results": sample_log_results}}))
+
+    assert await mock_coralogix_client.fetch_service_names() == ["old-service"]
+    await asyncio.gather(*mock_coralogix_client._background_tasks)
+    assert await mock_coralogix_client.fetch_service_names() == ["test-service-1", "test-service-2"]
+    assert len(mock_coralogix_client._api.calls) == 1
+
+@pytest.mark.asyncio
+async def test_background_refresh_warms_catalog(mock_coralogix_client, sample_log_results):
+    """Test the background refresher loads the catalog and stops after the last user releases it"""
+
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({"result": {"results": sample_log_results}}))
+    await mock_coralogix_client.start_background_refresh()
+    await mock_coralogix_client.start_background_refresh()
+    for _ in range(50):
+        if mock_coralogix_client.service_names_available:
+            break
+        await asyncio.sleep(0.01)
+    assert mock_coralogix_client.service_names_available == ["test-service-1", "test-service-2"]
+
+    await mock_coralogix_client.stop_background_refresh()
+    assert mock_coralogix_client._refresh_task is not None
+    await mock_coralogix_client.stop_background_refresh()
+    assert mock_coralogix_client._refresh_task is None
+    assert len(mock_coralogix_client._api.calls) == 1
+
+@pytest.mark.asyncio
+async def test_find_matching_coralogix_service_name_negative_cache(mock_coralogix_client):
+    """Test misses are cached so repeated lookups of unknown services skip the catalog and LLM"""
+    mock_coralogix_client.fetch_service_names = AsyncMock(return_value=["test-service-1", "test-service-2"])
+    mock_coralogix_client.call_llm = AsyncMock(return_value=None)
+
+    assert await mock_coralogix_client.find_matching_coralogix_service_name("unknown") is None
+    assert await mock_coralogix_client.find_matching_coralogix_service_name("unknown") is None
+    assert mock_coralogix_client.fetch_service_names.await_count == 1
+    assert mock_coralogix_client.call_llm.await_count == 1
+
+@pytest.mark.asyncio
+async def test_catalog_change_invalidates_matches(mock_coralogix_client, sample_log_results):
+    """Test a catalog change only drops resolutions to services that left it, and misses once services were added"""
+    mock_coralogix_client._service_name_cache["data"] = ["old-service", "test-service-1"]
+    mock_coralogix_client._service_name_cache["timestamp"] = datetime.now(timezone.utc)
+    mock_coralogix_client._remember_match("old", "old-service")
+    mock_coralogix_client._remember_match("service-1", "test-service-1")
+    mock_coralogix_client._service_name_matching_cache.set("service-2", NO_MATCH)
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({"result": {"results": sample_log_results}}))
+
+    await mock_coralogix_client.refresh_service_names()
+    assert "old" not in mock_coralogix_client._service_name_matching_cache
+    assert "service-2" not in mock_coralogix_client._service_name_matching_cache
+    assert mock_coralogix_client._service_name_matching_cache.get("service-1") == "test-service-1"
+
+@pytest.mark.asyncio
+async def test_http_overview_serves_per_class_queries(mock_coralogix_client):
+    """Test one combined query answers the 2xx, 4xx and 5xx statistics"""
+    mock_coralogix_client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service")
+    rows = [
+        {"new_path": "/a", "http_method": "GET", "status_code": 200, "log_count": 10},
+        {"new_path": "/a", "http_method": "GET", "status_code": 404, "log_count": 3},
+        {"new_path": "/b", "http_method": "POST", "status_code": 503, "log_count": 2},
+    ]
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({
+        "result": {"results": [{"logRecord": {"body": {"log": json.dumps(row)}}} for row in rows]}
+    }))
+
+    overview = await mock_coralogix_client.search_http_overview("test-service", end="2024-03-20T10:00:00Z")
+    assert [log["status_code"] for log in overview["4xx"]] == [404]
+    assert "$d.status_code:num >= 200 && $d.status_code:num <= 599" in mock_coralogix_client._api.calls[0]["query"]
+
+    five_xx = await mock_coralogix_client.search_http_logs("test-service", "5xx", end="2024-03-20T10:00:00Z")
+    assert [log["new_path"] for log in five_xx] == ["/b"]
+    assert len(mock_coralogix_client._api.calls) == 1
+
+@pytest.mark.asyncio
+async def test_search_recent_error_logs_projected_fields(mock_coralogix_client):
+    """Test the CRITICAL search projects only the consumed fields and parses the projected records"""
+    mock_coralogix_client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service-1")
+    projected = {
+        "log": "Critical error: Database connection failed",
+        "timestamp": "2024-03-20T10:01:00Z",
+        "subsystemname": "test-service-1",
+        "severity": "CRITICAL"
+    }
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({
+        "result": {"results": [{"userData": json.dumps(projected)}]}
+    }))
+
+    results = await mock_coralogix_client.search_recent_error_logs("test-service-1")
+    assert "| choose $d.logRecord.body.log as $d.log" in mock_coralogix_client._api.calls[0]["query"]
+    assert results == [{
+        "timestamp": "2024-03-20 10:01:00 UTC",
+        "service": "test-service-1",
+        "severity": "CRITICAL",
+        "log_message": "Critical error: Database connection failed"
+    }]
+
+@pytest.mark.asyncio
+async def test_search_generate_query_projects_fields(mock_coralogix_client):
+    """Test string searches project the consumed fields before the limit"""
+    mock_coralogix_client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service")
+    query = await mock_coralogix_client.search_generate_query("timeout", "test-service")
+    assert query.endswith("$l.subsystemname as $d.subsystemname, $m.severity as $d.severity | limit 100")
+
+def test_select_tier(mock_coralogix_client):
+    """Test recent short windows use frequent search and everything else the archive"""
+    now = datetime.now(timezone.utc)
+    assert mock_coralogix_client.select_tier(now - timedelta(minutes=15), now) == "TIER_FREQUENT_SEARCH"
+    assert mock_coralogix_client.select_tier(now - timedelta(hours=12), now) == "TIER_ARCHIVE"
+    assert mock_coralogix_client.select_tier(now - timedelta(days=3), now - timedelta(days=3) + timedelta(minutes=15)) == "TIER_ARCHIVE"
+    assert mock_coralogix_client.select_tier(now - timedelta(minutes=15), now, tier="archive") == "TIER_ARCHIVE"
+    with pytest.raises(ValueError):
+        mock_coralogix_client.select_tier(now - timedelta(minutes=15), now, tier="cold")
+
+@pytest.mark.asyncio
+async def test_search_coralogix_logs_reports_tier_latency(mock_coralogix_client):
+    """Test the chosen tier is sent and its latency recorded"""
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({"result": {"results": [{"userData": "{}"}]}}))
+    await mock_coralogix_client.search_coralogix_logs("recent query")
+    await mock_coralogix_client.search_coralogix_logs("old query", end="2024-03-20T10:00:00Z")
+
+    assert [call["metadata"]["tier"] for call in mock_coralogix_client._api.calls] == ["TIER_FREQUENT_SEARCH", "TIER_ARCHIVE"]
+    tiers = mock_coralogix_client.stats()["tiers"]
+    assert tiers["TIER_FREQUENT_SEARCH"]["queries"] == 1
+    assert tiers["TIER_ARCHIVE"]["queries"] == 1
+
+@pytest.mark.asyncio
+async def test_empty_frequent_search_is_not_retried(mock_coralogix_client):
+    """Test an empty frequent-search answer, the healthy case for error lookups, costs one query"""
+    mock_coralogix_client._api.respond(json.dumps({"result": {"results": []}}))
+    assert await mock_coralogix_client.search_coralogix_logs("recent query") == []
+    assert [call["metadata"]["tier"] for call in mock_coralogix_client._api.calls] == ["TIER_FREQUENT_SEARCH"]
+
+    # The catalog always comes from the archive, which holds every subsystem
+    await mock_coralogix_client.refresh_service_names()
+    assert mock_coralogix_client._api.calls[-1]["metadata"]["tier"] == "TIER_ARCHIVE"
+
+@pytest.mark.asyncio
+async def test_search_coralogix_logs_sharded_window(mock_coralogix_client):
+    """Test long windows are queried as aligned shards whose groupby counts are summed"""
+    row = {"new_path": "/a", "http_method": "GET", "status_code": 500, "log_count": 2}
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({
+        "result": {"results": [{"logRecord": {"body": {"log": json.dumps(row)}}}]}
+    }))
+
+    results = await mock_coralogix_client.search_coralogix_logs(
+        "groupby query", start="2024-03-20T06:30:00Z", end="2024-03-20T10:00:00Z", query_type="http"
+    )
+    windows = sorted((call["metadata"]["startTime"], call["metadata"]["endTime"]) for call in mock_coralogix_client._api.calls)
+    assert windows[0] == ("2024-03-20T06:30:00.000000Z", "2024-03-20T07:00:00.000000Z")
+    assert windows[-1] == ("2024-03-20T09:00:00.000000Z", "2024-03-20T10:00:00.000000Z")
+    assert len(windows) == 4
+    assert results == [{"new_path": "/a", "http_method": "GET", "status_code": 500, "log_count": 8}]
+
+    # An overlapping later window only fetches the shards it has not seen
+    await mock_coralogix_client.search_coralogix_logs(
+        "groupby query", start="2024-03-20T07:00:00Z", end="2024-03-20T11:00:00Z", query_type="http"
+    )
+    assert len(mock_coralogix_client._api.calls) == 5
+
+@pytest.mark.asyncio
+async def test_sharded_window_uses_one_tier(mock_coralogix_client):
+    """Test every shard of a long recent window queries the tier chosen for the whole window"""
+    mock_coralogix_client._api.respond(json.dumps({"result": {"results": []}}))
+
+    await mock_coralogix_client.search_coralogix_logs("groupby query", time_range_minutes=720, query_type="http")
+    tiers = {call["metadata"]["tier"] for call in mock_coralogix_client._api.calls}
+    assert len(mock_coralogix_client._api.calls) >= 12
+    assert tiers == {"TIER_ARCHIVE"}
+
+def test_merge_by_timestamp_applies_limit():
+    """Test raw shard results are merged newest first and re-limited"""
+
+    shards = [[{"timestamp": "2024-03-20T10:00:00Z"}], [{"timestamp": "2024-03-20T11:00:00Z"}, {"timestamp": "2024-03-20T09:00:00Z"}]]
+    assert query_limit("source logs | limit 2") == 2
+    assert query_limit("source logs | filter x") is None
+    merged = merge_by_timestamp(shards, limit=2)
+    assert [record["timestamp"] for record in merged] == ["2024-03-20T11:00:00Z", "2024-03-20T10:00:00Z"]
+
+@pytest.mark.asyncio
+async def test_search_http_logs_incremental_polls(mock_coralogix_client):
+    """Test a repeated rolling-window poll only fetches the minutes that are not sealed yet"""
+    mock_coralogix_client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service")
+    minute = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=5)
+    row = {"minute": minute.isoformat(), "new_path": "/a", "http_method": "GET", "status_code": 503, "log_count": 4}
+    mock_coralogix_client._api.respond('{"status": "ok"}\n' + json.dumps({
+        "result": {"results": [{"logRecord": {"body": {"log": json.dumps(row)}}}]}
+    }))
+
+    first = await mock_coralogix_client.search_http_logs("test-service", "5xx", 15)
+    second = await mock_coralogix_client.search_http_logs("test-service", "5xx", 15)
+
+    assert first == second == [{"new_path": "/a", "http_method": "GET", "status_code": 503, "log_count": 4}]
+    calls = mock_coralogix_client._api.calls
+    assert len(calls) == 2
+    assert "roundTime($m.timestamp, 1m) as minute" in calls[0]["query"]
+    first_start = datetime.fromisoformat(calls[0]["metadata"]["startTime"].replace("Z", "+00:00"))
+    second_start = datetime.fromisoformat(calls[1]["metadata"]["startTime"].replace("Z", "+00:00"))
+    assert second_start - first_start >= timedelta(minutes=12)
+
+@pytest.mark.asyncio
+async def test_search_logs_page_follows_cursor(mock_coralogix_client, monkeypatch):
+    """Test a cursor pages through every match in chunks, without duplicates at chunk boundaries"""
+
+    monkeypatch.setattr(client_module, "CURSOR_FETCH_SIZE", 4)
+    mock_coralogix_client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service")
+    # Two logs share 09:57 so the first chunk ends in the middle of a timestamp
+    timestamps = [f"2024-03-20T09:{minute:02d}:00.000000Z" for minute in (59, 58, 57, 57, 56, 55, 54)]
+    queries = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        queries.append(body)
+        end = parse_timestamp(body["metadata"]["endTime"])
+        limit = int(body["query"].rsplit("| limit ", 1)[1])
+        matching = [ts for ts in timestamps if parse_timestamp(ts) < end][:limit]
+        return httpx.Response(200, text=json.dumps({"result": {"results": [
+            {"userData": json.dumps({"log": "timeout", "timestamp": ts})} for ts in matching
+        ]}}))
+
+    mock_coralogix_client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    seen = []
+    page = await mock_coralogix_client.search_logs_page("timeout", "test-service", page_size=3, start="2024-03-20T09:00:00Z", end="2024-03-20T10:00:00Z")
+    assert "orderby $m.timestamp desc" in queries[0]["query"]
+    while True:
+        seen.extend(record["timestamp"] for record in page["results"])
+        if page["next_cursor"] is None:
+            break
+        again = await mock_coralogix_client.search_logs_page(cursor=page["next_cursor"], page_size=3)
+        page = await mock_coralogix_client.search_logs_page(cursor=page["next_cursor"], page_size=3)
+        assert again["results"] == page["results"]
+
+    assert seen == timestamps
+    assert len(queries) == 3
+
+    with pytest.raises(ValueError):
+        await mock_coralogix_client.search_logs_page(cursor="bm90LWEtY3Vyc29yOjA", page_size=3)
+
+@pytest.mark.asyncio
+async def test_search_cursor_resumes_on_another_worker(tmp_path, monkeypatch):
+    """Test pages requested alternately from two workers sharing a cache return every match once"""
+
+    monkeypatch.setattr(client_module, "CURSOR_FETCH_SIZE", 4)
+    timestamps = [f"2024-03-20T09:{minute:02d}:00.000000Z" for minute in (59, 58, 57, 57, 57, 56, 55, 54)]
+
+    def handler(request):
+        body = json.loads(request.content)
+        end = parse_timestamp(body["metadata"]["endTime"])
+        limit = int(body["query"].rsplit("| limit ", 1)[1])
+        matching = [ts for ts in timestamps if parse_timestamp(ts) < end][:limit]
+        return httpx.Response(200, text=json.dumps({"result": {"results": [
+            {"userData": json.dumps({"log": f"timeout {index}", "timestamp": ts})} for index, ts in enumerate(matching)
+        ]}}))
+
+    workers = []
+    for _ in range(2):
+        worker = CoralogixClient(model="m", openai_api_key="k", coralogix_api_key="k", application_name="test-app", cache_path=str(tmp_path / "cache.sqlite3"), shared_results=True)
+        worker._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        worker.find_matching_coralogix_service_name = AsyncMock(return_value="test-service")
+        workers.append(worker)
+
+    seen = []
+    page = await workers[0].search_logs_page("timeout", "test-service", page_size=3, start="2024-03-20T09:00:00Z", end="2024-03-20T10:00:00Z")
+    turn = 1
+    while True:
+        seen.extend(record["timestamp"] for record in page["results"])
+        if page["next_cursor"] is None:
+            break
+        page = await workers[turn % 2].search_logs_page(cursor=page["next_cursor"], page_size=3)
+        turn += 1
+
+    assert seen == timestamps
+
+    other_application = CoralogixClient(model="m", openai_api_key="k", coralogix_api_key="k", application_name="billing")
+    first = await workers[0].search_logs_page("timeout", "test-service", page_size=3, start="2024-03-20T09:00:00Z", end="2024-03-20T10:00:00Z")
+    with pytest.raises(ValueError):
+        await other_application.search_logs_page(cursor=first["next_cursor"], page_size=3)
+
+@pytest.mark.asyncio
+async def test_search_coralogix_logs_retries_server_errors(mock_coralogix_client):
+    """Test a 503 from the API is retried by the transport policy instead of failing the search"""
+
+    responses = [httpx.Response(503, text="unavailable"), httpx.Response(200, text=json.dumps({"result": {"results": [{"userData": "{}"}]}}))]
+    mock_coralogix_client._http = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+
+    async def no_sleep(seconds):
+        pass
+
+    mock_coralogix_client.transport = TransportPolicy(sleep=no_sleep)
+    results = await mock_coralogix_client.search_coralogix_logs("source logs", end="2024-03-20T10:00:00Z")
+    assert len(results) == 1
+    assert mock_coralogix_client.stats()["transport"]["retries"] == 1
+
+@pytest.mark.asyncio
+async def test_shared_results_across_workers(tmp_path, sample_log_results):
+    """Test a query answered by one worker is served to another from the shared store"""
+
+    path = str(tmp_path / "cache.sqlite3")
+    api_calls = []
+
+    def handler(request):
+        api_calls.append(request)
+        return httpx.Response(200, text=json.dumps({"result": {"results": sample_log_results}}))
+
+    workers = []
+    for _ in range(2):
+        worker = CoralogixClient(model="m", openai_api_key="k", coralogix_api_key="k", application_name="test-app", cache_path=path, shared_results=True)
+        worker._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        workers.append(worker)
+
+    first = await workers[0].search_coralogix_logs("source logs | limit 10", end="2024-03-20T10:00:00Z")
+    second = await workers[1].search_coralogix_logs("source logs | limit 10", end="2024-03-20T10:00:00Z")
+    assert len(api_calls) == 1
+    assert [log["subsystemname"] for log in second] == [log["subsystemname"] for log in first]
+
+    # The second worker adopts the catalog the first one just refreshed
+    await workers[0].refresh_service_names()
+    assert await workers[1].refresh_service_names() == ["test-service-1", "test-service-2"]
+    assert len(api_calls) == 2
+
+@pytest.mark.asyncio
+async def test_large_results_are_not_shared(tmp_path, monkeypatch):
+    """Test results past MAX_SHARED_RESULT_RECORDS stay local to the worker"""
+
+    monkeypatch.setattr(client_module, "MAX_SHARED_RESULT_RECORDS", 2)
+    worker = CoralogixClient(model="m", openai_api_key="k", coralogix_api_key="k", application_name="test-app", cache_path=str(tmp_path / "cache.sqlite3"), shared_results=True)
+    await worker._save_shared_results(("small",), [{"a": 1}], ttl=60)
+    await worker._save_shared_results(("large",), [{"a": 1}] * 3, ttl=60)
+
+    assert await worker._load_shared_results(("small",)) is not None
+    assert await worker._load_shared_results(("large",)) is None
+
+@pytest.mark.asyncio
+async def test_resolve_service_names_bounds_concurrency(mock_coralogix_client):
+    """Test a large batch resolves at most MAX_CONCURRENT_NAME_RESOLUTIONS names at a time"""
+    active, peak = 0, 0
+
+    async def slow_match(name):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return name
+
+    mock_coralogix_client.fetch_service_names = AsyncMock(return_value=[])
+    mock_coralogix_client.find_matching_coralogix_service_name = slow_match
+    resolved, unresolved = await mock_coralogix_client.resolve_service_names([f"service-{i}" for i in range(20)])
+
+    assert len(resolved) == 20 and unresolved == []
+    assert peak == MAX_CONCURRENT_NAME_RESOLUTIONS
+
+@pytest.mark.asyncio
+async def test_search_http_logs_by_service_grouped_query(mock_coralogix_client):
+    """Test several services are resolved in one pass and answered by one query grouped by subsystem"""
+    mock_coralogix_client.fetch_service_names = AsyncMock(return_value=["checkout", "payments", "search"])
+    mock_coralogix_client.find_matching_coralogix_service_name = AsyncMock(side_effect=lambda name: {"pay": "payments", "checkout": "checkout"}.get(name))
+    rows = [
+        {"subsystemname": "payments", "new_path": "/pay", "http_method": "POST", "status_code": 503, "log_count": 7},
+        {"subsystemname": "checkout", "new_path": "/cart", "http_method": "GET", "status_code": 500, "log_count": 2},
+    ]
+    mock_coralogix_client._api.respond(json.dumps({"result": {"results": [{"userData": json.dumps(row)} for row in rows]}}))
+
+    resolved, unresolved = await mock_coralogix_client.resolve_service_names(["pay", "checkout", "nope"])
+    assert resolved == {"pay": "payments", "checkout": "checkout"}
+    assert unresolved == ["nope"]
+
+    by_service = await mock_coralogix_client.search_http_logs_by_service(["payments", "checkout"], "5xx", end="2024-03-20T10:00:00Z")
+    assert len(mock_coralogix_client._api.calls) == 1
+    query = mock_coralogix_client._api.calls[0]["query"]
+    assert "($l.subsystemname == 'payments' || $l.subsystemname == 'checkout')" in query
+    assert "groupby $l.subsystemname, $d.new_path" in query
+    assert [row["log_count"] for row in by_service["payments"]] == [7]
+    assert [row["new_path"] for row in by_service["checkout"]] == ["/cart"]
+
+    assert (await mock_coralogix_client.resolve_service_names("all"))[0] == {"checkout": "checkout", "payments": "payments", "search": "search"}
+
+@pytest.mark.asyncio
+async def test_search_http_logs_by_service_fans_out(mock_coralogix_client, monkeypatch):
+    """Test long service lists fan out per service under the concurrency limit"""
+
+    monkeypatch.setattr(client_module, "MAX_GROUPED_SERVICES", 2)
+    monkeypatch.setattr(client_module, "MAX_CONCURRENT_SERVICE_QUERIES", 2)
+    running, peak = 0, 0
+
+    async def search_http_logs(name, *args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [] if name != "b" else None
+
+    mock_coralogix_client.search_http_logs = search_http_logs
+    by_service = await mock_coralogix_client.search_http_logs_by_service(["a", "b", "c", "d"], "5xx")
+    assert by_service == {"a": [], "b": None, "c": [], "d": []}
+    assert peak == 2
@@ -0,0 +1,29 @@
+import json
+import pytest
+from coralogix_mcp.common.ndjson import iter_dataprime_results, iter_ndjson
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson_handles_lines_split_across_chunks():
+    """Test lines are reassembled regardless of where chunk boundaries fall"""
+    data = b'{"a": 1}\n\n{"b": [1, 2, 3]}\n{"c": "x"}'
+    messages = [message async for message in iter_ndjson(chunked(data, 3))]
+    assert messages == [{"a": 1}, {"b": [1, 2, 3]}, {"c": "x"}]
+
+
+@pytest.mark.asyncio
+async def test_iter_dataprime_results_reads_every_batch():
+    """Test records from every result batch are yielded, not just the first one"""
+    data = "\n".join([
+        json.dumps({"queryId": {"queryId": "q1"}}),
+        json.dumps({"result": {"results": [{"n": 1}, {"n": 2}]}}),
+        json.dumps({"warning": {"message": "partial"}}),
+        json.dumps({"result": {"results": [{"n": 3}]}}),
+    ]).encode()
+    records = [record async for record in iter_dataprime_results(chunked(data, 7))]
+    assert records == [{"n": 1}, {"n": 2}, {"n": 3}]
@@ -0,0 +1,38 @@
+import json
+from unittest.mock import patch
+from coralogix_mcp.common import jsonlib
+from coralogix_mcp.common.records import LazyRecord, dump_records, load_records
+
+
+def test_lazy_record_decodes_on_first_read():
+    """Test the inner log payload is decoded once, on first access"""
+    record = LazyRecord({"logRecord": {"body": {"log": json.dumps({"new_path": "/a", "log_count": 3})}}})
+    with patch.object(jsonlib, "loads", wraps=jsonlib.loads) as loads:
+        assert loads.call_count == 0
+        assert record.get("new_path") == "/a"
+        assert record["log_count"] == 3
+        assert dict(record) == {"new_path": "/a", "log_count": 3}
+        assert loads.call_count == 1
+
+
+def test_lazy_record_falls_back_to_user_data():
+    """Test records without a JSON log body fall back to userData"""
+    record = LazyRecord({"logRecord": {"body": {"log": "plain text"}}, "userData": '{"subsystemname": "svc"}'})
+    assert record.get("subsystemname") == "svc"
+    assert LazyRecord({"userData": "not json"}).get("anything") is None
+
+
+def test_jsonlib_stdlib_fallback():
+    """Test decoding still works when orjson is not installed"""
+    with patch.object(jsonlib, "orjson", None):
+        assert jsonlib.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+def test_dump_and_load_records_round_trip():
+    """Test raw records stay lazy and aggregated rows stay plain dicts through serialization"""
+
+    records = [LazyRecord({"userData": '{"subsystemname": "svc"}'}), {"new_path": "/a", "log_count": 2}]
+    loaded = load_records(json.loads(json.dumps(dump_records(records))))
+    assert isinstance(loaded[0], LazyRecord)
+    assert loaded[0]["subsystemname"] == "svc"
+    assert loaded[1] == {"new_path": "/a", "log_count": 2}
@@ -0,0 +1,74 @@
+import pytest
+
+from coralogix_mcp.registry import ClientRegistry
+
+
+@pytest.fixture
+def registry(mock_env_vars):
+    return ClientRegistry(
+        default_application="test-app",
+        client_kwargs={"model": "m", "openai_api_key": "k", "coralogix_api_key": "k"},
+        applications=["billing"],
+        tenant_requests_per_second=2
+    )
+
+
+def test_registry_shares_resources_between_applications(registry):
+    """Test per-application clients share the pool, limiter, breaker and cache but not cache entries"""
+    default = registry.get()
+    billing = registry.get("billing")
+
+    assert registry.get("test-app") is default
+    assert registry.get("billing") is billing
+    assert billing.application_name == "billing"
+    assert billing.http is default.http
+    assert billing.transport.rate_limiter is default.transport.rate_limiter
+    assert billing.transport.breaker is default.transport.breaker
+    assert billing.transport.tenant_limiter is not default.transport.tenant_limiter
+    assert billing.query_cache.cache is default.query_cache.cache
+
+    default.query_cache.set("key", [1])
+    assert billing.query_cache.get("key") is None
+    assert set(registry.stats()["applications"]) == {"test-app", "billing"}
+
+
+def test_registry_rejects_unknown_applications(registry):
+    """Test only the configured applications can be served"""
+    with pytest.raises(ValueError):
+        registry.get("payroll")
+
+
+@pytest.mark.asyncio
+async def test_registry_aclose_closes_shared_pool(registry):
+    """Test closing a client leaves the shared pool open until the registry closes"""
+    client = registry.get("billing")
+    pool = client.http
+    await client.aclose()
+    assert not pool.is_closed
+    await registry.aclose()
+    assert pool.is_closed
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_least_recently_used_clients(mock_env_vars, tmp_path):
+    """Test a full registry closes its least recently used client instead of refusing new applications"""
+    registry = ClientRegistry(
+        default_application="test-app",
+        client_kwargs={"model": "m", "openai_api_key": "k", "coralogix_api_key": "k", "cache_path": str(tmp_path / "cache.sqlite3")},
+        max_applications=3
+    )
+    default = registry.get()
+    first = registry.get("first")
+    second = registry.get("second")
+    first.query_cache.set("key", [1])
+    registry.get("first")
+
+    registry.get("third")
+    assert set(registry.clients) == {"test-app", "first", "third"}
+    registry.get("fourth")
+    assert set(registry.clients) == {"test-app", "third", "fourth"}
+    assert registry.get() is default
+    assert first.query_cache.get("key") is None
+
+    await registry.aclose()
+    assert second._store is None and first._store is None and default._store is None
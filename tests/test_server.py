@@ -0,0 +1,211 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock
+from starlette.testclient import TestClient
+from coralogix_mcp.server import CoralogixMCPServer
+
+@pytest.fixture
+def mock_server(mock_coralogix_client):
+    """Create a CoralogixMCPServer wired to the mocked CoralogixClient"""
+    server = CoralogixMCPServer(
+        model="gpt-3.5-turbo",
+        openai_api_key="test_openai_key",
+        coralogix_api_key="test_coralogix_key",
+        application_name="test-app"
+    )
+    server.client = mock_coralogix_client
+    return server
+
+@pytest.mark.asyncio
+async def test_get_5xx_logs_runs_queries_concurrently(mock_server, sample_http_logs, sample_error_logs):
+    """Test the endpoint statistics and CRITICAL details queries overlap and reuse the resolved name"""
+    client = mock_server.client
+    client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service-1")
+
+    async def slow_search(service_name, query_type, *window):
+        await asyncio.sleep(0.1)
+        return sample_http_logs
+
+    async def slow_errors(service_name, *window):
+        await asyncio.sleep(0.1)
+        return sample_error_logs
+
+    client.search_http_logs = slow_search
+    client.search_recent_error_logs = AsyncMock(side_effect=slow_errors)
+
+    started = time.monotonic()
+    result = await mock_server.get_5xx_logs("test")
+    elapsed = time.monotonic() - started
+
+    assert result["status"] == "success"
+    assert result["api_analysis"]["total_requests"] == 150
+    assert result["total_errors"] == 2
+    assert elapsed < 0.18
+    client.search_recent_error_logs.assert_awaited_once_with("test-service-1", None, None, None, None)
+
+@pytest.mark.asyncio
+async def test_get_4xx_logs_deadline(mock_server, sample_error_logs):
+    """Test a query that misses the shared deadline is cancelled instead of stalling the tool"""
+    client = mock_server.client
+    mock_server.tool_deadline = 0.05
+    client.find_matching_coralogix_service_name = AsyncMock(return_value="test-service-1")
+
+    async def hung_search(service_name, query_type, *window):
+        await asyncio.sleep(10)
+
+    client.search_http_logs = hung_search
+    client.search_recent_error_logs = AsyncMock(return_value=sample_error_logs)
+
+    result = await mock_server.get_4xx_logs("test-service-1")
+    assert result["api_analysis"] == "Error fetching 4XX error logs"
+    assert result["total_errors"] == 2
+
+@pytest.mark.asyncio
+async def test_lifespan_starts_and_stops_catalog_refresh(mock_server):
+    """Test the server lifespan drives the background catalog refresher"""
+    client = mock_server.client
+    client.start_background_refresh = AsyncMock()
+    client.stop_background_refresh = AsyncMock()
+
+    async with mock_server._lifespan(mock_server.mcp):
+        client.start_background_refresh.assert_awaited_once()
+        client.stop_background_refresh.assert_not_awaited()
+    client.stop_background_refresh.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_share_catalog_refresher(mock_server):
+    """Test overlapping session lifespans share one refresher that stops with the last session"""
+    client = mock_server.client
+    client._catalog_refresh_loop = AsyncMock()
+
+    async with mock_server._lifespan(mock_server.mcp):
+        refresher = client._refresh_task
+        async with mock_server._lifespan(mock_server.mcp):
+            assert client._refresh_task is refresher
+        assert client._refresh_task is refresher
+    assert client._refresh_task is None
+    client._catalog_refresh_loop.assert_called_once()
+
+def test_run_network_transport_honors_host_and_port(mock_server):
+    """Test the network transports listen on the requested host and port"""
+    mock_server.mcp.run_streamable_http_async = AsyncMock()
+    mock_server.registry.aclose = AsyncMock()
+    mock_server.run_mcp_blocking(transport="streamable-http", host="0.0.0.0", port=9100)
+
+    mock_server.mcp.run_streamable_http_async.assert_awaited_once()
+    mock_server.registry.aclose.assert_awaited_once()
+    assert mock_server.mcp.settings.host == "0.0.0.0"
+    assert mock_server.mcp.settings.port == 9100
+    with pytest.raises(ValueError):
+        mock_server.run_mcp_blocking(transport="websocket")
+
+def test_shutdown_closes_clients(mock_env_vars, tmp_path):
+    """Test stopping the server closes its clients, releasing pooled connections and the disk store"""
+    server = CoralogixMCPServer(
+        model="gpt-3.5-turbo",
+        openai_api_key="test_openai_key",
+        coralogix_api_key="test_coralogix_key",
+        application_name="test-app",
+        cache_path=str(tmp_path / "cache.sqlite3")
+    )
+    pool = server.client.http
+    server.mcp.run_stdio_async = AsyncMock()
+    server.run_mcp_blocking()
+
+    assert pool.is_closed
+    assert server.client._store is None
+
+def test_network_transport_accepts_remote_host_header(mock_server):
+    """Test a server bound to all interfaces answers requests addressed to a non-local Host"""
+
+    mock_server.client._catalog_refresh_loop = AsyncMock()
+    mock_server.configure_network("0.0.0.0", 8000)
+    initialize = {
+        "jsonrpc": "2.0", "id": 1, "method": "initialize",
+        "params": {"protocolVersion": "2025-03-26", "capabilities": {}, "clientInfo": {"name": "test", "version": "1"}}
+    }
+    with TestClient(mock_server.mcp.streamable_http_app(), base_url="http://10.0.0.5:8000") as http:
+        response = http.post("/mcp", json=initialize, headers={"Accept": "application/json, text/event-stream"})
+
+    assert response.status_code == 200
+
+def test_stateless_app_keeps_one_catalog_refresher(mock_server):
+    """Test a stateless worker app runs the refresher for its whole lifespan, not per request"""
+
+    async def refresh_forever():
+        await asyncio.sleep(3600)
+
+    client = mock_server.client
+    client._catalog_refresh_loop = AsyncMock(side_effect=refresh_forever)
+    mock_server.mcp.settings.stateless_http = True
+    ping = {"jsonrpc": "2.0", "id": 1, "method": "ping"}
+    with TestClient(mock_server.streamable_http_app(), base_url="http://localhost:8000") as http:
+        refresher = client._refresh_task
+        assert refresher is not None
+        for _ in range(3):
+            http.post("/mcp", json=ping, headers={"Accept": "application/json, text/event-stream"})
+        assert client._refresh_task is refresher
+
+    assert client._refresh_task is None
+    client._catalog_refresh_loop.assert_called_once()
+
+def test_loopback_transport_keeps_dns_rebinding_protection(mock_server):
+    """Test a loopback-only server still rejects foreign Host headers"""
+    mock_server.configure_network("127.0.0.1", 8000)
+    assert mock_server.mcp.settings.transport_security.enable_dns_rebinding_protection
+
+@pytest.mark.asyncio
+async def test_get_http_overview(mock_server, sample_http_logs):
+    """Test the overview tool analyzes every status class from one result"""
+    client = mock_server.client
+    client.search_http_overview = AsyncMock(return_value={"2xx": [sample_http_logs[0]], "4xx": [sample_http_logs[1]], "5xx": []})
+
+    result = await mock_server.get_http_overview("test-service-1")
+    assert result["status"] == "success"
+    assert result["api_analysis"]["2xx"]["total_requests"] == 100
+    assert result["api_analysis"]["4xx"]["total_requests"] == 50
+    assert result["api_analysis"]["5xx"] == "No 5XX requests found in the specified time period"
+
+@pytest.mark.asyncio
+async def test_get_coralogix_logs_by_string_paged(mock_server):
+    """Test page_size switches the search tool to cursor-based pages"""
+    client = mock_server.client
+    client.search_logs_page = AsyncMock(return_value={
+        "results": [{"log": "request timeout", "timestamp": "2024-03-20T10:00:00Z", "subsystemname": "test-service-1"}],
+        "offset": 0,
+        "next_cursor": "token",
+        "truncated": False
+    })
+
+    result = await mock_server.get_coralogix_logs_by_string("timeout", "test-service-1", page_size=1)
+    assert result["status"] == "success"
+    assert result["next_cursor"] == "token"
+    assert result["total_matches"] == 1
+    client.search_logs_page.assert_awaited_once_with("timeout", "test-service-1", None, 1, None, None, None, None)
+
+@pytest.mark.asyncio
+async def test_tools_route_application_name(mock_server, sample_http_logs):
+    """Test a tool call naming another application is served by that application's client"""
+    billing = mock_server.registry.get("billing")
+    billing.search_http_logs = AsyncMock(return_value=sample_http_logs)
+    mock_server.client.search_http_logs = AsyncMock()
+
+    result = await mock_server.get_2xx_logs("api", application_name="billing")
+    assert result["status"] == "success"
+    billing.search_http_logs.assert_awaited_once()
+    mock_server.client.search_http_logs.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_http_logs_by_service_all(mock_server, sample_http_logs):
+    """Test the batch tool lists only services with matching logs, busiest first"""
+    client = mock_server.client
+    client.resolve_service_names = AsyncMock(return_value=({"svc-a": "svc-a", "svc-b": "svc-b", "svc-c": "svc-c"}, []))
+    client.search_http_logs_by_service = AsyncMock(return_value={"svc-a": [sample_http_logs[1]], "svc-b": sample_http_logs, "svc-c": []})
+
+    result = await mock_server.get_http_logs_by_service("all", "5xx")
+    assert result["status"] == "success"
+    assert list(result["services"]) == ["svc-b", "svc-a"]
+    assert result["total_requests"] == 200
+    client.resolve_service_names.assert_awaited_once_with("all")
+    assert client.search_http_logs_by_service.await_args.kwargs["all_services"] is True
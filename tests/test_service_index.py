@@ -0,0 +1,19 @@
+from coralogix_mcp.common.service_index import ServiceNameIndex
+
+
+def test_service_name_index_top_k():
+    """Test fuzzy top-k ranking over the catalog"""
+    index = ServiceNameIndex(["payments-api", "payments-worker", "user-service", "orders-api"])
+    ranked = index.top_k("payment-api", k=2)
+    assert [name for name, _ in ranked] == ["payments-api", "payments-worker"]
+    assert ranked[0][1] > ranked[1][1]
+    assert index.top_k("zzzz") == []
+
+
+def test_service_name_index_exact_and_substring():
+    """Test case-insensitive exact lookups and substring matches in catalog order"""
+    index = ServiceNameIndex(["Auth", "auth-service", "api", "billing"])
+    assert index.exact("AUTH") == "Auth"
+    assert index.substring_matches("auth") == ["Auth", "auth-service"]
+    assert index.substring_matches("billing-v2") == ["billing"]
+    assert index.substring_matches("ap") == ["api"]
@@ -0,0 +1,21 @@
+import asyncio
+import pytest
+from coralogix_mcp.common.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_caller_cancellation():
+    """Test cancelling one waiter does not cancel the shared call for the others"""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", work))
+    second = asyncio.ensure_future(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    assert flight.stats() == {"executed": 1, "shared": 1, "in_flight": 0}
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+# Cumulative import time budget for coralogix_mcp.server, in microseconds
+IMPORT_BUDGET_US = int(os.environ.get("CORALOGIX_MCP_IMPORT_BUDGET_US", "2000000"))
+
+
+def _import_times(module: str) -> dict:
+    """Return cumulative import times in microseconds, as reported by python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_server_import_does_not_load_litellm():
+    """Test litellm is only imported when the LLM is first used"""
+    times = _import_times("coralogix_mcp.server")
+    assert "litellm" not in times
+
+
+def test_server_import_time_budget():
+    """Test server cold-start import time stays within budget"""
+    # Warm the bytecode cache so the measurement reflects import time rather than compilation
+    _import_times("coralogix_mcp.server")
+    times = _import_times("coralogix_mcp.server")
+    assert times["coralogix_mcp.server"] < IMPORT_BUDGET_US
@@ -0,0 +1,68 @@
+import sqlite3
+import time
+from unittest.mock import patch
+from coralogix_mcp.common.store import PersistentStore
+
+
+def test_persistent_store_round_trip(tmp_path):
+    """Test catalog and resolutions survive reopening the store"""
+    path = str(tmp_path / "cache" / "store.sqlite3")
+    store = PersistentStore(path)
+    store.save_catalog("app", ["svc-a", "svc-b"])
+    store.save_resolution("app", "a", "svc-a")
+    store.close()
+
+    reopened = PersistentStore(path)
+    names, updated_at = reopened.load_catalog("app")
+    assert names == ["svc-a", "svc-b"]
+    assert updated_at <= time.time()
+    assert reopened.load_resolutions("app") == {"a": "svc-a"}
+    assert reopened.load_catalog("other-app") is None
+
+
+def test_persistent_store_forgets_resolutions_by_target(tmp_path):
+    """Test only the resolutions leading to forgotten services are deleted"""
+    store = PersistentStore(str(tmp_path / "store.sqlite3"))
+    store.save_resolution("app", "a", "svc-a")
+    store.save_resolution("app", "old", "svc-old")
+    store.save_resolution("other-app", "old", "svc-old")
+    store.forget_resolutions("app", ["svc-old"])
+    assert store.load_resolutions("app") == {"a": "svc-a"}
+    assert store.load_resolutions("other-app") == {"old": "svc-old"}
+
+
+def test_persistent_store_expires_entries(tmp_path):
+    """Test entries older than their TTL are not returned"""
+    store = PersistentStore(str(tmp_path / "store.sqlite3"), catalog_ttl=60, resolution_ttl=60)
+    with patch("coralogix_mcp.common.store.time.time", return_value=time.time() - 120):
+        store.save_catalog("app", ["svc-a"])
+        store.save_resolution("app", "a", "svc-a")
+    assert store.load_catalog("app") is None
+    assert store.load_resolutions("app") == {}
+
+
+def test_persistent_store_rebuilds_on_schema_change(tmp_path):
+    """Test a store written with another schema version is dropped"""
+    path = str(tmp_path / "store.sqlite3")
+    store = PersistentStore(path)
+    store.save_catalog("app", ["svc-a"])
+    store.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA user_version = 999")
+    conn.close()
+
+    assert PersistentStore(path).load_catalog("app") is None
+
+
+def test_persistent_store_shared_results(tmp_path):
+    """Test query results are shared until they expire"""
+    store = PersistentStore(str(tmp_path / "store.sqlite3"))
+    store.save_results("app", "key", [{"data": {"log_count": 3}}], ttl=60)
+    results, expires_at = store.load_results("app", "key")
+    assert results == [{"data": {"log_count": 3}}]
+    assert expires_at > time.time()
+
+    store.save_results("app", "old", [], ttl=-1)
+    assert store.load_results("app", "old") is None
+    assert store.load_results("other-app", "key") is None
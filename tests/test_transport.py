@@ -0,0 +1,88 @@
+import httpx
+import pytest
+
+from coralogix_mcp.common.transport import CircuitBreaker, CircuitOpenError, RetryableStatusError, TokenBucket, TransportPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_throttles_after_burst():
+    """Test requests beyond the burst wait for tokens at the configured rate"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, timer=clock, sleep=clock.sleep)
+    for _ in range(4):
+        await bucket.acquire()
+
+    assert clock.slept == [0.5, 0.5]
+    assert bucket.stats() == {"acquired": 4, "throttled": 2, "wait_seconds": 1.0}
+
+
+def test_circuit_breaker_opens_and_probes():
+    """Test the breaker fails fast after repeated failures and closes after a successful probe"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, timer=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["opened"] == 1
+    assert breaker.stats()["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_transport_policy_retries_retryable_errors():
+    """Test 429/5xx and timeouts are retried with backoff, honouring Retry-After"""
+    clock = FakeClock()
+    policy = TransportPolicy(max_attempts=3, sleep=clock.sleep)
+    outcomes = [RetryableStatusError(429, retry_after=2.0), httpx.ReadTimeout("timed out"), "ok"]
+
+    async def request():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await policy.run(request) == "ok"
+    assert clock.slept[0] == 2.0
+    assert 0 <= clock.slept[1] <= 1.0
+    assert policy.stats()["retries"] == 2
+    assert policy.stats()["circuit"]["state"] == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_transport_policy_fails_fast_when_open():
+    """Test non-idempotent requests are not retried and an open circuit rejects requests"""
+    clock = FakeClock()
+    policy = TransportPolicy(breaker=CircuitBreaker(failure_threshold=1, timer=clock), sleep=clock.sleep)
+    calls = []
+
+    async def request():
+        calls.append(1)
+        raise RetryableStatusError(503)
+
+    with pytest.raises(RetryableStatusError):
+        await policy.run(request, idempotent=False)
+    with pytest.raises(CircuitOpenError):
+        await policy.run(request)
+    assert len(calls) == 1
+    assert clock.slept == []
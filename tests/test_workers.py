@@ -0,0 +1,25 @@
+import os
+import pytest
+from coralogix_mcp import workers
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="worker mode needs os.fork")
+def test_workers_that_fail_to_start_stop_the_server(monkeypatch):
+    """Test a worker crashing at startup is restarted with backoff, then the server gives up"""
+    monkeypatch.setattr(workers, "WORKER_RESTART_BASE_DELAY", 0.01)
+    monkeypatch.setattr(workers, "MAX_FAST_WORKER_FAILURES", 3)
+    spawned = []
+    real_fork = os.fork
+
+    def counting_fork():
+        pid = real_fork()
+        if pid:
+            spawned.append(pid)
+        return pid
+
+    def broken_server():
+        raise RuntimeError("bad configuration")
+
+    monkeypatch.setattr(os, "fork", counting_fork)
+    assert workers.run_workers(broken_server, "streamable-http", "127.0.0.1", 0, 1) == 1
+    assert len(spawned) == 3